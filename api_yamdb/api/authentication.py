@@ -0,0 +1,123 @@
+import copy
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import ADMIN, MODERATOR, USER, User
+
+from .cache import users_cache
+
+ROLE_VERSION_KEY = 'role_version:{}'
+USER_ID_CLAIM = jwt_settings.USER_ID_CLAIM
+ROLE_CLAIM = 'role'
+ROLE_VERSION_CLAIM = 'role_version'
+# Версия удалённого или неактивного пользователя: не совпадает ни с одной
+# выданной.
+REVOKED = -1
+
+
+class RoleTokenUser(TokenUser):
+    """Пользователь из утверждений токена, без запроса к базе.
+
+    Отвечает на те же вопросы о правах, что и User, но сохранить его
+    нельзя: для изменения профиля пользователя нужно загрузить из базы.
+    """
+
+    @cached_property
+    def role(self):
+        return self.token.get(ROLE_CLAIM, USER)
+
+    @property
+    def is_admin(self):
+        return self.role == ADMIN or self.is_staff
+
+    @property
+    def is_user(self):
+        return self.role == USER
+
+    @property
+    def is_moderator(self):
+        return self.role == MODERATOR
+
+
+def get_role_version(user_id):
+    """Текущая версия прав пользователя, из кеша или из базы"""
+    key = ROLE_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(
+            pk=user_id, is_active=True
+        ).values_list('role_version', flat=True).first()
+        version = REVOKED if version is None else version
+        cache.set(key, version, settings.ROLE_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+def set_role_version(user_id, version):
+    cache.set(
+        ROLE_VERSION_KEY.format(user_id), version,
+        settings.ROLE_VERSION_CACHE_TIMEOUT
+    )
+
+
+def get_access_token(user):
+    """Токен доступа; в режиме JWT_ROLE_CLAIMS с ролью пользователя"""
+    token = AccessToken.for_user(user)
+    if settings.JWT_ROLE_CLAIMS:
+        token['username'] = user.username
+        token['is_staff'] = user.is_staff
+        token[ROLE_CLAIM] = user.role
+        token[ROLE_VERSION_CLAIM] = user.role_version
+    return token
+
+
+class RoleJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без загрузки пользователя для токенов с ролью.
+
+    Токен с ролью действует, пока версия прав в нём совпадает с текущей:
+    смена роли, статуса или удаление пользователя его отзывает. Токены без
+    роли обрабатываются как раньше, с загрузкой пользователя из базы.
+    """
+
+    def get_user(self, validated_token):
+        if ROLE_CLAIM not in validated_token:
+            return self.get_model_user(validated_token)
+        user = RoleTokenUser(validated_token)
+        if get_role_version(user.id) != validated_token.get(
+            ROLE_VERSION_CLAIM
+        ):
+            raise AuthenticationFailed(
+                'Права пользователя изменились, получите новый токен.',
+                code='role_changed'
+            )
+        return user
+
+    def get_model_user(self, validated_token):
+        """Пользователь из базы для токена без роли"""
+        return super().get_user(validated_token)
+
+
+class CachedJWTAuthentication(RoleJWTAuthentication):
+    """Хранит пользователей токенов без роли в кеше процесса.
+
+    Записи удаляются при сохранении и удалении пользователя в том же
+    процессе, в остальном живут USERS_CACHE_TTL секунд. Запись с версией
+    прав, отличной от текущей, загружается заново: смена роли или статуса
+    в другом процессе действует не дольше ROLE_VERSION_CACHE_TIMEOUT
+    секунд. Каждый запрос получает свою копию пользователя, изменения в
+    ней не попадают в кеш.
+    """
+
+    def get_model_user(self, validated_token):
+        user_id = validated_token.get(USER_ID_CLAIM)
+        user = users_cache.get(user_id)
+        if user is None or user.role_version != get_role_version(user_id):
+            user = super().get_model_user(validated_token)
+            users_cache.set(user_id, user)
+        return copy.copy(user)
@@ -0,0 +1,202 @@
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from reviews.models import Category, Genre, Review, Title, TitleGenre, User
+
+from .cache import bump_titles_version
+from .serializers import (
+    ReviewBulkSerializer, ReviewSerializer, TitleBulkSerializer
+)
+
+
+def bulk_create_with_pks(model, objs):
+    """bulk_create, который заполняет pk и там, где бэкенд не возвращает
+    их из INSERT (SQLite в Django 3.2).
+
+    Внутри транзакции SQLite держит блокировку записи, а AUTOINCREMENT
+    выдаёт возрастающие ключи, поэтому последние len(objs) ключей
+    принадлежат только что вставленным строкам в порядке вставки.
+    """
+    with transaction.atomic():
+        objs = model.objects.bulk_create(objs)
+        if objs and objs[0].pk is None:
+            pks = model.objects.order_by('-pk').values_list(
+                'pk', flat=True
+            )[:len(objs)]
+            for obj, pk in zip(objs, reversed(pks)):
+                obj.pk = pk
+    return objs
+
+
+def check_bulk_items(items, max_size, name):
+    """Тело пакетного запроса: список не длиннее max_size"""
+    if not isinstance(items, list):
+        raise serializers.ValidationError(f'Ожидается список {name}.')
+    if len(items) > max_size:
+        raise serializers.ValidationError(
+            f'Можно передать не более {max_size} {name}.'
+        )
+
+
+def validate_items(items, serializer_class, partial=None):
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        serializer = serializer_class(
+            data=item, partial=partial is not None and partial(item)
+        )
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            results[index] = {'errors': serializer.errors}
+    return results, valid
+
+
+def resolve_relations(data, genres, categories, titles):
+    """Ошибки ссылок элемента на несуществующие объекты."""
+    errors = {}
+    missing = [slug for slug in data.get('genre', ()) if slug not in genres]
+    if missing:
+        errors['genre'] = [f'Жанр {slug} не найден.' for slug in missing]
+    if 'category' in data and data['category'] not in categories:
+        errors['category'] = [f'Категория {data["category"]} не найдена.']
+    if 'id' in data and data['id'] not in titles:
+        errors['id'] = [f'Произведение {data["id"]} не найдено.']
+    return errors
+
+
+def build_title(data, categories, title=None):
+    title = title or Title()
+    for field in ('name', 'year', 'description'):
+        if field in data:
+            setattr(title, field, data[field])
+    if 'category' in data:
+        title.category_id = categories[data['category']]
+    title.modified = timezone.now()
+    return title
+
+
+def save_titles(items):
+    """Создаёт и обновляет произведения пачкой.
+
+    Слаги жанров и категорий разрешаются одним запросом на модель,
+    произведения и связи с жанрами пишутся через bulk_create/bulk_update.
+    Ошибки отдельных элементов не прерывают сохранение остальных; повтор
+    id в пакете — ошибка элемента, первое изменение сохраняется.
+    """
+    results, valid = validate_items(
+        items,
+        TitleBulkSerializer,
+        partial=lambda item: isinstance(item, dict) and 'id' in item
+    )
+    genres = dict(Genre.objects.filter(
+        slug__in={slug for _, data in valid for slug in data.get('genre', ())}
+    ).values_list('slug', 'id'))
+    categories = dict(Category.objects.filter(
+        slug__in={data['category'] for _, data in valid if 'category' in data}
+    ).values_list('slug', 'id'))
+    titles = Title.objects.in_bulk(
+        {data['id'] for _, data in valid if 'id' in data}
+    )
+    created, updated = [], []
+    seen = set()
+    for index, data in valid:
+        errors = resolve_relations(data, genres, categories, titles)
+        if 'id' in data and data['id'] in seen:
+            errors['id'] = [
+                f'Произведение {data["id"]} уже изменено в этом пакете.'
+            ]
+        if errors:
+            results[index] = {'errors': errors}
+        elif 'id' in data:
+            seen.add(data['id'])
+            title = titles[data['id']]
+            updated.append((index, data, build_title(data, categories, title)))
+        else:
+            created.append((index, data, build_title(data, categories)))
+    with transaction.atomic():
+        bulk_create_with_pks(Title, [title for _, _, title in created])
+        Title.objects.bulk_update(
+            [title for _, _, title in updated],
+            ['name', 'year', 'description', 'category', 'modified']
+        )
+        TitleGenre.objects.filter(title_id__in=[
+            title.pk for _, data, title in updated if 'genre' in data
+        ]).delete()
+        TitleGenre.objects.bulk_create(
+            TitleGenre(title_id=title.pk, genre_id=genres[slug])
+            for _, data, title in created + updated
+            for slug in dict.fromkeys(data.get('genre', ()))
+        )
+        transaction.on_commit(bump_titles_version)
+    for status, saved in (('created', created), ('updated', updated)):
+        for index, _, title in saved:
+            results[index] = {'id': title.pk, 'status': status}
+    return results
+
+
+def check_review(data, titles, authors, reviewed):
+    """Ошибки элемента: несуществующие произведение и автор, повторный
+    отзыв автора на произведение в базе или в этом же пакете."""
+    errors = {}
+    if data['title_id'] not in titles:
+        errors['title_id'] = [f'Произведение {data["title_id"]} не найдено.']
+    if data['author'] not in authors:
+        errors['author'] = [f'Пользователь {data["author"]} не найден.']
+    elif (data['title_id'], authors[data['author']]) in reviewed:
+        errors[api_settings.NON_FIELD_ERRORS_KEY] = [
+            ReviewSerializer.duplicate_message
+        ]
+    return errors
+
+
+def save_reviews(items):
+    """Добавляет отзывы пакетом.
+
+    Произведения, авторы и уже существующие отзывы выбираются одним
+    запросом каждые, отзывы вставляются через bulk_create. Рейтинг и
+    гистограмма оценок пересчитываются один раз для всех затронутых
+    произведений.
+    """
+    results, valid = validate_items(items, ReviewBulkSerializer)
+    titles = set(Title.objects.filter(
+        pk__in={data['title_id'] for _, data in valid}
+    ).values_list('pk', flat=True))
+    authors = dict(User.objects.filter(
+        username__in={data['author'] for _, data in valid}
+    ).values_list('username', 'pk'))
+    reviewed = set(Review.objects.filter(
+        title_id__in=titles, author_id__in=authors.values()
+    ).values_list('title_id', 'author_id'))
+    created = []
+    for index, data in valid:
+        errors = check_review(data, titles, authors, reviewed)
+        if errors:
+            results[index] = {'errors': errors}
+            continue
+        reviewed.add((data['title_id'], authors[data['author']]))
+        created.append((index, data, Review(
+            title_id=data['title_id'],
+            author_id=authors[data['author']],
+            text=data['text'],
+            score=data['score'],
+        )))
+    with transaction.atomic():
+        bulk_create_with_pks(Review, [review for _, _, review in created])
+        dated = []
+        for _, data, review in created:
+            if 'pub_date' in data:
+                review.pub_date = data['pub_date']
+                dated.append(review)
+        Review.objects.bulk_update(dated, ['pub_date'])
+        titles = Title.objects.filter(
+            pk__in={review.title_id for _, _, review in created}
+        )
+        titles.recalculate_scores()
+        titles.recalculate_trending()
+        transaction.on_commit(bump_titles_version)
+    for index, _, review in created:
+        results[index] = {'id': review.pk, 'status': 'created'}
+    return results
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from reviews.models import TITLES_VERSION, CacheVersion
+
+
+class LRUCache:
+    """Ограниченный по размеру кеш процесса.
+
+    Вытесняет давно не использованные записи, считает попадания и промахи.
+    Запись считается промахом, если устарела по ttl или сохранена с другой
+    версией данных.
+    """
+
+    def __init__(self, max_size, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != version or (
+                    entry[1] is not None and entry[1] < time.monotonic()):
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, value, version=None):
+        expires = None
+        if self.ttl is not None:
+            expires = time.monotonic() + self.ttl
+        with self.lock:
+            self.entries[key] = (version, expires, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'size': len(self.entries),
+                'max_size': self.max_size,
+            }
+
+
+titles_cache = LRUCache(
+    settings.TITLES_CACHE_SIZE, ttl=settings.TITLES_CACHE_TTL
+)
+users_cache = LRUCache(settings.USERS_CACHE_SIZE, ttl=settings.USERS_CACHE_TTL)
+
+
+def get_titles_version():
+    """Версия каталога произведений.
+
+    Хранится в таблице CacheVersion и меняется после каждой записи в
+    каталог, поэтому записи любого процесса сразу делают устаревшими
+    страницы в кешах всех процессов.
+    """
+    return CacheVersion.objects.get_value(TITLES_VERSION)
+
+
+def bump_titles_version():
+    CacheVersion.objects.bump(TITLES_VERSION)
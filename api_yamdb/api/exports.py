@@ -0,0 +1,70 @@
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+REVIEW_EXPORT_FIELDS = {
+    'id': 'id',
+    'title': 'title_id',
+    'author': 'author__username',
+    'text': 'text',
+    'score': 'score',
+    'pub_date': 'pub_date',
+    'comment_count': 'comment_count',
+}
+COMMENT_EXPORT_FIELDS = {
+    'id': 'id',
+    'title': 'review__title_id',
+    'review': 'review_id',
+    'author': 'author__username',
+    'text': 'text',
+    'pub_date': 'pub_date',
+}
+
+
+def to_ndjson(data):
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False) + '\n'
+
+
+class NDJSONRenderer(BaseRenderer):
+    """JSON по одному объекту на строку (application/x-ndjson)"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return to_ndjson(data).encode(self.charset)
+
+
+def iterate_rows(queryset, fields, chunk_size=None):
+    """Строки queryset порциями по возрастанию первичного ключа.
+
+    Каждая порция выбирается отдельным запросом «pk больше последнего»,
+    поэтому память не зависит от числа строк, а стоимость запроса —
+    от глубины выгрузки.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    names = list(fields)
+    queryset = queryset.order_by('pk').values_list('pk', *fields.values())
+    last = None
+    while True:
+        chunk = queryset if last is None else queryset.filter(pk__gt=last)
+        rows = list(chunk[:chunk_size])
+        for row in rows:
+            yield dict(zip(names, row[1:]))
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1][0]
+
+
+def stream_ndjson(queryset, fields, filename):
+    response = StreamingHttpResponse(
+        (to_ndjson(row) for row in iterate_rows(queryset, fields)),
+        content_type=NDJSONRenderer.media_type
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -8,7 +8,11 @@ class FilterTitle(filters.FilterSet):
     category = filters.CharFilter(field_name='category__slug')
     year = filters.NumberFilter(field_name='year')
     name = filters.CharFilter(field_name='name', lookup_expr='contains')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
         fields = '__all__'
+
+    def filter_search(self, queryset, name, value):
+        return queryset.search(value)
@@ -0,0 +1,290 @@
+import binascii
+import heapq
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from functools import reduce
+from itertools import islice
+from operator import and_, or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination, LimitOffsetPagination, _positive_int
+)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Пагинация по ключу сортировки (keyset).
+
+    Страница выбирается условием «после последней строки предыдущей
+    страницы», поэтому стоимость запроса не зависит от глубины листания.
+    Курсор непрозрачен для клиента. NULL считается наименьшим значением,
+    строки с NULL в первом поле ключа выбираются отдельным запросом,
+    чтобы каждый запрос оставался поиском по индексу.
+    """
+    ordering = ('-id',)
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = api_settings.PAGE_SIZE
+    max_limit = None
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def get_fields(self, reverse=False):
+        return [
+            (field.lstrip('-'), field.startswith('-') != reverse)
+            for field in self.ordering
+        ]
+
+    def get_limit(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.limit_query_param],
+                strict=True,
+                cutoff=self.max_limit
+            )
+        except (KeyError, ValueError):
+            return self.default_limit
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        position, reverse = self.decode_cursor(request, queryset.model)
+        fields = self.get_fields(reverse)
+        ordering = [
+            f'-{field}' if descending else field
+            for field, descending in fields
+        ]
+        leading, descending = fields[0]
+        segments = [False, True] if descending else [True, False]
+        if position is not None:
+            segments = segments[segments.index(position[0] is None):]
+        rows = []
+        for is_null in segments:
+            segment = queryset.filter(**{f'{leading}__isnull': is_null})
+            if position is not None and is_null == (position[0] is None):
+                segment = segment.filter(
+                    self.get_filter(fields, position, is_null)
+                )
+            rows.extend(
+                segment.order_by(*ordering)[:self.limit + 1 - len(rows)]
+            )
+            if len(rows) > self.limit:
+                break
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if reverse:
+            rows.reverse()
+        self.has_next = position is not None if reverse else has_more
+        self.has_previous = has_more if reverse else position is not None
+        self.page = rows
+        return rows
+
+    @staticmethod
+    def follows(field, value, descending):
+        if value is None:
+            return None if descending else Q(**{f'{field}__isnull': False})
+        if descending:
+            return (
+                Q(**{f'{field}__lt': value})
+                | Q(**{f'{field}__isnull': True})
+            )
+        return Q(**{f'{field}__gt': value})
+
+    @staticmethod
+    def equals(field, value):
+        if value is None:
+            return Q(**{f'{field}__isnull': True})
+        return Q(**{field: value})
+
+    def get_filter(self, fields, position, leading_is_null):
+        """Условие «строго после position» в пределах сегмента."""
+        start = 1 if leading_is_null else 0
+        field, descending = fields[start]
+        seek = Q()
+        if position[start] is not None:
+            seek = Q(**{
+                f'{field}__lte' if descending else f'{field}__gte':
+                position[start]
+            })
+        conditions = []
+        equal = []
+        for (field, descending), value in zip(
+                fields[start:], position[start:]):
+            follows = self.follows(field, value, descending)
+            if follows is not None:
+                conditions.append(reduce(and_, equal, follows))
+            equal.append(self.equals(field, value))
+        if not conditions:
+            return Q(pk__in=[])
+        return seek & reduce(or_, conditions)
+
+    def get_position(self, row):
+        return [
+            row[field] if isinstance(row, dict) else getattr(row, field)
+            for field, _ in self.get_fields()
+        ]
+
+    def encode_cursor(self, row, reverse):
+        cursor = json.dumps(
+            {'p': self.get_position(row), 'r': int(reverse)}, default=str
+        )
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            urlsafe_b64encode(cursor.encode()).decode()
+        )
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode()))
+            values = cursor['p']
+            fields = self.get_fields()
+            if len(values) != len(fields):
+                raise ValueError
+            position = [
+                None if value is None
+                else model._meta.get_field(field).to_python(value)
+                for (field, _), value in zip(fields, values)
+            ]
+            return position, bool(cursor['r'])
+        except (
+            binascii.Error, KeyError, TypeError, ValueError, ValidationError
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class TitleKeysetPagination(KeysetPagination):
+    ordering = ('-rating', 'name', 'id')
+
+
+class AuthorActivityPagination(KeysetPagination):
+    ordering = ('-pub_date', '-id')
+
+
+class FeedPagination(KeysetPagination):
+    """Лента из нескольких потоков, слитых по (pub_date, id) от новых
+    к старым.
+
+    Курсор хранит позицию последнего отданного элемента каждого потока,
+    поэтому страница стоит по одному запросу не более limit + 1 строк на
+    поток и не зависит от размера таблиц. Строки без pub_date в ленту не
+    попадают. Листать можно только вперёд.
+    """
+    ordering = ('-pub_date', '-id')
+    max_limit = 100
+
+    def paginate_streams(self, streams, request):
+        """streams — словарь {имя потока: queryset}; возвращает пары
+        (имя потока, объект)."""
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.positions = self.decode_positions(request, streams)
+        fields = self.get_fields()
+        ordering = [f'-{field}' for field, _ in fields]
+        heads = []
+        for name, queryset in streams.items():
+            queryset = queryset.filter(pub_date__isnull=False)
+            if self.positions.get(name) is not None:
+                queryset = queryset.filter(
+                    self.get_filter(fields, self.positions[name], False)
+                )
+            heads.append([
+                (name, row)
+                for row in queryset.order_by(*ordering)[:self.limit + 1]
+            ])
+        rows = list(islice(heapq.merge(
+            *heads,
+            key=lambda item: (item[1].pub_date, item[1].id),
+            reverse=True
+        ), self.limit + 1))
+        self.has_next = len(rows) > self.limit
+        self.page = rows[:self.limit]
+        for name, row in self.page:
+            self.positions[name] = self.get_position(row)
+        return self.page
+
+    def decode_positions(self, request, streams):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return {}
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode()))
+            return {
+                name: self.decode_position(streams[name].model, values)
+                for name, values in cursor.items()
+            }
+        except (
+            binascii.Error, AttributeError, KeyError, TypeError, ValueError,
+            ValidationError
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def decode_position(self, model, values):
+        if values is None:
+            return None
+        fields = self.get_fields()
+        if len(values) != len(fields) or None in values:
+            raise ValueError
+        return [
+            model._meta.get_field(field).to_python(value)
+            for (field, _), value in zip(fields, values)
+        ]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        cursor = json.dumps(self.positions, default=str)
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            urlsafe_b64encode(cursor.encode()).decode()
+        )
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+
+class TitlePagination(LimitOffsetPagination):
+    """limit/offset по умолчанию, keyset-пагинация по (rating, name, id),
+    если передан параметр cursor (пустое значение — первая страница)."""
+    keyset_class = TitleKeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -9,6 +9,14 @@ class AdminOnly(BasePermission):
         return user.is_authenticated and user.is_admin
 
 
+class ModeratorAdmin(BasePermission):
+    """Разрешение доступа только модератору и администратору"""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return user.is_authenticated and (user.is_moderator or user.is_admin)
+
+
 class AuthorModeratorAdminOrReadOnly(BasePermission):
     """Разрешение доступа на чтение всем и
     на редактирование только
@@ -24,7 +32,7 @@ class AuthorModeratorAdminOrReadOnly(BasePermission):
         user = request.user
         return (
             request.method in SAFE_METHODS
-            or obj.author == user
+            or obj.author_id == user.pk
             or user.is_admin
             or user.is_moderator
         )
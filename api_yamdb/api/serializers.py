@@ -1,6 +1,9 @@
+from collections import defaultdict
+
 from django.conf import settings
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from django.shortcuts import get_object_or_404
+from rest_framework.settings import api_settings
 
 
 from reviews.models import Category, Comment, Genre, Review, Title, User
@@ -62,20 +65,26 @@ class CommentSerializer(serializers.ModelSerializer):
 class ReviewSerializer(serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True, slug_field='username')
+    duplicate_message = (
+        'Вы не можете добавить более одного отзыва на произведение'
+    )
 
-    def validate(self, data):
-        if self.context['request'].method != 'POST':
-            return data
-        if Review.objects.filter(
-            author=self.context['request'].user,
-            title=get_object_or_404(
-                Title,
-                id=self.context['view'].kwargs.get('title_id'))
-        ).exists():
-            raise serializers.ValidationError(
-                'Вы не можете добавить более'
-                'одного отзыва на произведение')
-        return data
+    def save(self, **kwargs):
+        """Повторный отзыв отсекает ограничение unique_review, без
+        предварительной проверки: так нет лишнего запроса и гонки.
+        Остальные нарушения ограничений не выдаются за повтор отзыва."""
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError:
+            if self.instance is not None or not Review.objects.filter(
+                title_id=kwargs.get('title_id'),
+                author_id=kwargs['author'].pk
+            ).exists():
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [self.duplicate_message]
+            })
 
     def validate_score(self, value):
         if not (settings.MIN_SCORE_VALUE <= value <= settings.MAX_SCORE_VALUE):
@@ -88,7 +97,68 @@ class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = (
-            'id', 'text', 'author', 'pub_date', 'score')
+            'id', 'text', 'author', 'pub_date', 'score', 'comment_count')
+
+
+class ReviewBulkSerializer(serializers.ModelSerializer):
+    title_id = serializers.IntegerField(min_value=1)
+    author = serializers.CharField(max_length=settings.LEN_USERNAME_NAME)
+    pub_date = serializers.DateTimeField(required=False)
+
+    class Meta:
+        model = Review
+        fields = ('title_id', 'author', 'text', 'score', 'pub_date')
+
+
+class AuthorReviewSerializer(ReviewSerializer):
+    title = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ('title',)
+
+
+class AuthorCommentSerializer(CommentSerializer):
+    title = serializers.IntegerField(source='review.title_id', read_only=True)
+    review = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ('title', 'review')
+
+
+class FeedTitleSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Title
+        fields = ('id', 'name')
+
+
+class FeedReviewSerializer(ReviewSerializer):
+    type = serializers.SerializerMethodField()
+    title = FeedTitleSerializer(read_only=True)
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ('type',) + ReviewSerializer.Meta.fields + ('title',)
+
+    def get_type(self, review):
+        return 'review'
+
+
+class FeedCommentSerializer(CommentSerializer):
+    type = serializers.SerializerMethodField()
+    review = serializers.PrimaryKeyRelatedField(read_only=True)
+    title = FeedTitleSerializer(source='review.title', read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = (
+            ('type',) + CommentSerializer.Meta.fields + ('review', 'title')
+        )
+
+    def get_type(self, comment):
+        return 'comment'
+
+
+class FeedQuerySerializer(serializers.Serializer):
+    since = serializers.DateTimeField(required=False)
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -126,6 +196,116 @@ class TitlesReadOnlySerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+class TitleValuesSerializer:
+    """Быстрое представление произведений только для чтения.
+
+    Строит тот же JSON, что и TitlesReadOnlySerializer, напрямую из строк
+    .values() и кортежей жанров, без полей DRF. Жанры всех произведений
+    выбираются одним запросом к связующей таблице.
+    """
+    values_fields = (
+        'id', 'name', 'year', 'description', 'rating',
+        'category__name', 'category__slug'
+    )
+
+    def __init__(self, instance, many=False):
+        self.instance = instance
+        self.many = many
+
+    @classmethod
+    def get_queryset(cls, queryset):
+        return queryset.prefetch_related(None).values(*cls.values_fields)
+
+    @staticmethod
+    def get_genres(title_ids):
+        genres = defaultdict(list)
+        for title_id, name, slug in Title.genre.through.objects.filter(
+            title_id__in=title_ids
+        ).order_by('genre__name').values_list(
+            'title_id', 'genre__name', 'genre__slug'
+        ):
+            genres[title_id].append({'name': name, 'slug': slug})
+        return genres
+
+    @staticmethod
+    def to_representation(row, genres):
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'year': row['year'],
+            'description': row['description'],
+            'rating': (
+                None if row['rating'] is None else int(row['rating'])
+            ),
+            'genre': genres.get(row['id'], []),
+            'category': None if row['category__slug'] is None else {
+                'name': row['category__name'],
+                'slug': row['category__slug'],
+            },
+        }
+
+    @property
+    def data(self):
+        rows = self.instance if self.many else [self.instance]
+        genres = self.get_genres([row['id'] for row in rows])
+        data = [self.to_representation(row, genres) for row in rows]
+        return data if self.many else data[0]
+
+
+class ScoreHistogramQuerySerializer(serializers.Serializer):
+    ids = serializers.CharField()
+
+    def validate_ids(self, value):
+        try:
+            ids = {int(title_id) for title_id in value.split(',')}
+        except ValueError:
+            raise serializers.ValidationError(
+                'Укажите id произведений через запятую.'
+            )
+        if len(ids) > settings.REST_FRAMEWORK['PAGE_SIZE']:
+            raise serializers.ValidationError(
+                'Можно запросить не более '
+                f'{settings.REST_FRAMEWORK["PAGE_SIZE"]} произведений.'
+            )
+        return ids
+
+
+class TrendingQuerySerializer(serializers.Serializer):
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.TRENDING_MAX_LIMIT,
+        default=settings.TRENDING_LIMIT
+    )
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    title = serializers.IntegerField(required=False, min_value=1)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    lookups = {
+        'title': 'title_id',
+        'since': 'pub_date__gte',
+        'until': 'pub_date__lt',
+    }
+
+    def get_filters(self):
+        return {
+            self.lookups[name]: value
+            for name, value in self.validated_data.items()
+        }
+
+
+class CommentExportQuerySerializer(ExportQuerySerializer):
+    review = serializers.IntegerField(required=False, min_value=1)
+
+    lookups = {
+        **ExportQuerySerializer.lookups,
+        'title': 'review__title_id',
+        'review': 'review_id',
+    }
+
+
 class TitleEditSerializer(serializers.ModelSerializer):
     genre = serializers.SlugRelatedField(
         slug_field='slug',
@@ -141,3 +321,14 @@ class TitleEditSerializer(serializers.ModelSerializer):
         model = Title
         fields = (
             'id', 'name', 'year', 'description', 'genre', 'category')
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+
+    class Meta:
+        model = Title
+        fields = (
+            'id', 'name', 'year', 'description', 'genre', 'category')
@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Category, Genre, Review, Title, User
+
+from .authentication import REVOKED, set_role_version
+from .cache import bump_titles_version, users_cache
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(m2m_changed, sender=Title.genre.through)
+def titles_changed(sender, **kwargs):
+    transaction.on_commit(bump_titles_version)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, raw=False, **kwargs):
+    forget_user(instance.pk)
+    if raw:
+        return
+    version = instance.role_version if instance.is_active else REVOKED
+    transaction.on_commit(lambda: set_role_version(instance.pk, version))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    user_id = instance.pk
+    forget_user(user_id)
+    transaction.on_commit(lambda: set_role_version(user_id, REVOKED))
+
+
+def forget_user(user_id):
+    """Удаляет пользователя из кеша сразу и после коммита: запрос,
+    прочитавший старую строку до коммита, не оставит её в кеше"""
+    users_cache.delete(user_id)
+    transaction.on_commit(lambda: users_cache.delete(user_id))
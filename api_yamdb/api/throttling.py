@@ -0,0 +1,208 @@
+import sqlite3
+import threading
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowStore:
+    """Счётчики скользящего окна в отдельном файле SQLite.
+
+    Файл открывают все процессы-обработчики на одной машине, запись
+    сериализует блокировка SQLite. Окно оценивается по двум фиксированным:
+    текущему и предыдущему, вклад предыдущего убывает по мере того, как
+    скользящее окно с ним перестаёт пересекаться. Проверка ключа — один
+    запрос по первичному ключу, не больше двух строк на ключ.
+    """
+    schema = (
+        'CREATE TABLE IF NOT EXISTS throttle ('
+        'key TEXT NOT NULL, window INTEGER NOT NULL, hits INTEGER NOT NULL, '
+        'expires REAL NOT NULL, PRIMARY KEY (key, window)) WITHOUT ROWID'
+    )
+    # Через сколько засчитанных запросов удалять устаревшие окна всех
+    # ключей, в том числе тех, с которых запросов больше нет.
+    purge_every = 1000
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def get_connection(self):
+        """Соединение потока с файлом из THROTTLE_DB_PATH"""
+        path = str(settings.THROTTLE_DB_PATH)
+        connections = self.local.__dict__.setdefault('connections', {})
+        if path not in connections:
+            connection = sqlite3.connect(
+                path, timeout=settings.THROTTLE_DB_TIMEOUT,
+                isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(self.schema)
+            connections[path] = connection
+        return connections[path]
+
+    @staticmethod
+    def get_wait(previous, current, limit, period, offset):
+        """Секунды до момента, когда оценка окна позволит ещё один запрос"""
+        if current < limit:
+            share = 1 - (limit - current - 1) / previous
+            return share * period - offset
+        share = 1 - (limit - 1) / current
+        return period - offset + share * period
+
+    def hit(self, keys, limit, period, now, count=True):
+        """Засчитывает запрос по всем ключам, если ни один не исчерпал лимит.
+
+        Возвращает None, если запрос разрешён, иначе число секунд, через
+        которое его можно повторить. С count=False только проверяет лимит.
+        """
+        window, offset = divmod(now, period)
+        window = int(window)
+        weight = 1 - offset / period
+        connection = self.get_connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            wait = 0
+            for key in keys:
+                hits = dict(connection.execute(
+                    'SELECT window, hits FROM throttle '
+                    'WHERE key = ? AND window >= ?', (key, window - 1)
+                ))
+                previous = hits.get(window - 1, 0)
+                current = hits.get(window, 0)
+                if previous * weight + current + 1 > limit:
+                    wait = max(wait, self.get_wait(
+                        previous, current, limit, period, offset
+                    ))
+            if not wait and count:
+                for key in keys:
+                    self.add_hit(connection, key, window, period)
+                self.purge(connection, now)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return wait or None
+
+    def add(self, keys, period, now):
+        """Засчитывает запрос по всем ключам без проверки лимита"""
+        window = int(now // period)
+        connection = self.get_connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for key in keys:
+                self.add_hit(connection, key, window, period)
+            self.purge(connection, now)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    @staticmethod
+    def add_hit(connection, key, window, period):
+        connection.execute(
+            'INSERT INTO throttle (key, window, hits, expires) '
+            'VALUES (?, ?, 1, ?) '
+            'ON CONFLICT (key, window) DO UPDATE SET hits = hits + 1',
+            (key, window, (window + 2) * period)
+        )
+        connection.execute(
+            'DELETE FROM throttle WHERE key = ? AND window < ?',
+            (key, window - 1)
+        )
+
+    def purge(self, connection, now):
+        self.local.hits = getattr(self.local, 'hits', 0) + 1
+        if self.local.hits % self.purge_every == 0:
+            connection.execute(
+                'DELETE FROM throttle WHERE expires <= ?', (now,)
+            )
+
+    def close(self):
+        """Закрывает соединения текущего потока"""
+        for connection in self.local.__dict__.pop('connections', {}).values():
+            connection.close()
+
+
+throttle_store = SlidingWindowStore()
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """Ограничение частоты со счётчиками в общем для процессов хранилище.
+
+    С count_requests = False запрос только проверяет лимит, а засчитывает
+    его представление вызовом count().
+    """
+    store = throttle_store
+    count_requests = True
+
+    def get_rate(self):
+        # Ставки читаются при создании ограничителя, а не при импорте, как
+        # в SimpleRateThrottle: так их можно менять в настройках.
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_idents(self, request):
+        raise NotImplementedError('.get_idents() must be overridden')
+
+    def get_keys(self, request):
+        return [
+            self.cache_format % {'scope': self.scope, 'ident': ident}
+            for ident in self.get_idents(request)
+        ]
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        keys = self.get_keys(request)
+        if not keys:
+            return True
+        self.wait_time = self.store.hit(
+            keys, self.num_requests, self.duration, self.timer(),
+            count=self.count_requests
+        )
+        return self.wait_time is None
+
+    def count(self, request):
+        """Засчитывает запрос, уже прошедший проверку лимита"""
+        if self.rate is None:
+            return
+        keys = self.get_keys(request)
+        if keys:
+            self.store.add(keys, self.duration, self.timer())
+
+    def wait(self):
+        return self.wait_time
+
+
+class AuthIPThrottle(SlidingWindowThrottle):
+    """Общий лимит регистрации и получения токена для IP-адреса"""
+    scope = 'auth_ip'
+
+    def get_idents(self, request):
+        return [self.get_ident(request)]
+
+
+class AuthIdentityThrottle(SlidingWindowThrottle):
+    """Лимит регистрации для username и email"""
+    scope = 'auth_identity'
+    fields = ('username', 'email')
+
+    def get_idents(self, request):
+        data = request.data if isinstance(request.data, dict) else {}
+        return [
+            f'{field}:{data[field].lower()}'
+            for field in self.fields
+            if isinstance(data.get(field), str)
+        ]
+
+
+class AuthCodeThrottle(AuthIdentityThrottle):
+    """Лимит неверных кодов подтверждения для username.
+
+    Засчитываются только неверные коды: запросы с верным кодом и
+    регистрации лимит не расходуют.
+    """
+    scope = 'auth_code'
+    fields = ('username',)
+    count_requests = False
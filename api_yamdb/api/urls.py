@@ -4,7 +4,8 @@ from rest_framework import routers
 from .views import (
     CategoryViewSet, CommentViewSet, GenreViewsSet,
     ReviewViewSet, TitleViewSet, UserViewSet,
-    create_token, create_user
+    bulk_reviews, cache_stats, create_token, create_user, export_comments,
+    export_reviews, feed
 )
 
 router_v1 = routers.DefaultRouter()
@@ -36,7 +37,16 @@ urls_auth = [
     path('auth/token/', create_token, name='create_token'),
 ]
 
+urls_reviews = [
+    path('reviews/bulk/', bulk_reviews, name='bulk_reviews'),
+    path('reviews/export/', export_reviews, name='export_reviews'),
+    path('comments/export/', export_comments, name='export_comments'),
+]
+
 urlpatterns = [
     path('v1/', include(urls_auth)),
+    path('v1/', include(urls_reviews)),
+    path('v1/feed/', feed, name='feed'),
+    path('v1/cache-stats/', cache_stats, name='cache_stats'),
     path('v1/', include(router_v1.urls)),
 ]
@@ -1,61 +1,202 @@
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import (
-    filters, mixins, permissions,
-    status, viewsets
+    filters, generics, mixins, permissions,
+    serializers, status, viewsets
+)
+from rest_framework.decorators import (
+    action, api_view, permission_classes, renderer_classes,
+    throttle_classes
 )
-from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.filters import SearchFilter
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import Category, Genre, Review, Title, User
+from rest_framework.settings import api_settings
+from reviews.models import (
+    Category, Comment, Genre, OutboxEmail, Review, ScoreCount, Title, User
+)
 
+from .authentication import get_access_token
+from .bulk import check_bulk_items, save_reviews, save_titles
+from .cache import get_titles_version, titles_cache, users_cache
+from .exports import (
+    COMMENT_EXPORT_FIELDS, REVIEW_EXPORT_FIELDS, NDJSONRenderer,
+    stream_ndjson
+)
 from .filters import FilterTitle
+from .pagination import (
+    AuthorActivityPagination, FeedPagination, TitlePagination
+)
 from .permissions import (
     AdminReadOnly, AdminOnly,
-    AuthorModeratorAdminOrReadOnly
+    AuthorModeratorAdminOrReadOnly, ModeratorAdmin
 )
 from .serializers import (
-    CategorySerializer, CommentSerializer,
-    GenreSerializer, UserCreateSerializer,
-    ReviewSerializer, TitleEditSerializer,
-    TitlesReadOnlySerializer, TokenSerializer,
+    AuthorCommentSerializer, AuthorReviewSerializer, CategorySerializer,
+    CommentExportQuerySerializer, CommentSerializer, ExportQuerySerializer,
+    FeedCommentSerializer, FeedQuerySerializer, FeedReviewSerializer,
+    GenreSerializer, ScoreHistogramQuerySerializer, UserCreateSerializer,
+    ReviewSerializer, TitleEditSerializer, TitleValuesSerializer,
+    TitlesReadOnlySerializer, TokenSerializer, TrendingQuerySerializer,
     UserSerializer, BaseUserSerializer,
 )
+from .throttling import (
+    AuthCodeThrottle, AuthIdentityThrottle, AuthIPThrottle
+)
+from .writebehind import write_buffer
+
+
+def get_title_modified(request, title_id=None, pk=None, **kwargs):
+    """Отметка изменения произведения, один запрос на HTTP-запрос"""
+    if not hasattr(request, 'title_modified'):
+        request.title_modified = Title.objects.filter(
+            pk=title_id if title_id is not None else pk
+        ).values_list('modified', flat=True).first()
+    return request.title_modified
+
+
+def title_etag(request, *args, **kwargs):
+    modified = get_title_modified(request, **kwargs)
+    if modified is None:
+        return None
+    return (
+        f'{kwargs.get("title_id", kwargs.get("pk"))}-'
+        f'{modified.timestamp()}-{request.accepted_renderer.format}'
+    )
+
+
+def get_request_titles_version(request):
+    """Версия каталога, один запрос на HTTP-запрос"""
+    request = getattr(request, '_request', request)
+    if not hasattr(request, 'titles_version'):
+        request.titles_version = get_titles_version()
+    return request.titles_version
+
+
+def get_request_author(request):
+    """Автор создаваемого объекта. Для пользователя из токена — заготовка
+    с id и username: ответ 201 не загружает автора из базы"""
+    user = request.user
+    if isinstance(user, User):
+        return user
+    return User(pk=user.pk, username=user.username)
+
+
+def titles_etag(request, *args, **kwargs):
+    return (
+        f'titles-{get_request_titles_version(request)}-'
+        f'{request.accepted_renderer.format}'
+    )
+
+
+title_condition = method_decorator(
+    condition(etag_func=title_etag, last_modified_func=get_title_modified)
+)
+
+
+class TitleConditionMixin:
+    """Условные GET-запросы (ETag/Last-Modified) по отметке
+    изменения произведения, без обращения к сериализатору"""
+
+    @title_condition
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @title_condition
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def check_title_exists(self):
+        """404, если произведения из URL нет; запрос общий с проверкой
+        условного GET"""
+        if get_title_modified(self.request, **self.kwargs) is None:
+            raise Http404
+
+
+class WriteBehindMixin:
+    """Отложенная запись создаваемых объектов при WRITE_BEHIND_ENABLED.
+
+    Проверенные данные уходят в очередь write_buffer, ответ 202 означает,
+    что запись принята и будет сохранена фоновым потоком. Если очередь
+    заполнена, объект сохраняется сразу и ответ, как обычно, 201.
+    """
+
+    def get_write_behind_fields(self, serializer):
+        raise NotImplementedError
+
+    def create(self, request, *args, **kwargs):
+        if not settings.WRITE_BEHIND_ENABLED:
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if not write_buffer.put(
+            serializer.Meta.model, self.get_write_behind_fields(serializer)
+        ):
+            return super().create(request, *args, **kwargs)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+
+def find_signup_conflicts(username, email):
+    """Пользователь с теми же username и email или ошибки по полям.
+
+    Оба поля проверяются одним запросом: повторная регистрация заново
+    отправляет код, а занятые другими пользователями поля попадают в ошибки.
+    """
+    users = User.objects.filter(Q(username=username) | Q(email=email))
+    errors = {}
+    for user in users:
+        if (user.username, user.email) == (username, email):
+            return user, None
+        if user.email == email:
+            errors['email'] = 'Email уже зарегистрирован'
+        if user.username == username:
+            errors['username'] = 'username уже зарегистрирован'
+    if not errors:
+        # Помешавшую вставке запись успели удалить.
+        errors[api_settings.NON_FIELD_ERRORS_KEY] = [
+            'Не удалось зарегистрироваться, повторите запрос.'
+        ]
+    return None, errors
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthIPThrottle, AuthIdentityThrottle])
 def create_user(request):
     serializer = UserCreateSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    try:
-        user, _ = User.objects.get_or_create(**serializer.validated_data)
-    except IntegrityError:
-        if User.objects.filter(email=request.data['email']).exists():
-            return Response({'email': 'Email уже зарегистрирован'},
-                            status=status.HTTP_400_BAD_REQUEST)
-        else:
-            return Response({'username': 'username уже зарегистрирован'},
-                            status=status.HTTP_400_BAD_REQUEST)
-    confirmation_code = default_token_generator.make_token(user)
-    send_mail(
-        subject='Регистрация в проекте YaMDb.',
-        message=f'Ваш код подтверждения: {confirmation_code}',
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email]
-    )
+    data = serializer.validated_data
+    # Пользователь и письмо с кодом сохраняются вместе.
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                user = User.objects.create(**data)
+        except IntegrityError:
+            user, errors = find_signup_conflicts(
+                data['username'], data['email']
+            )
+            if user is None:
+                return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        confirmation_code = default_token_generator.make_token(user)
+        OutboxEmail.objects.create(
+            subject='Регистрация в проекте YaMDb.',
+            message=f'Ваш код подтверждения: {confirmation_code}',
+            recipient=user.email
+        )
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
+@throttle_classes([AuthIPThrottle, AuthCodeThrottle])
 def create_token(request):
     serializer = TokenSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -65,13 +206,96 @@ def create_token(request):
     if default_token_generator.check_token(
             user, serializer.validated_data['confirmation_code']
     ):
-        token = RefreshToken.for_user(user)
         return Response(
-            {'access': str(token.access_token)}, status=status.HTTP_200_OK
+            {'access': str(get_access_token(user))}, status=status.HTTP_200_OK
         )
+    AuthCodeThrottle().count(request)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@permission_classes([AdminOnly])
+@renderer_classes([NDJSONRenderer, JSONRenderer])
+def export_reviews(request):
+    """Потоковая выгрузка отзывов в NDJSON"""
+    params = ExportQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    return stream_ndjson(
+        Review.objects.filter(**params.get_filters()),
+        REVIEW_EXPORT_FIELDS,
+        'reviews.ndjson'
+    )
+
+
+@api_view(['GET'])
+@permission_classes([AdminOnly])
+@renderer_classes([NDJSONRenderer, JSONRenderer])
+def export_comments(request):
+    """Потоковая выгрузка комментариев в NDJSON"""
+    params = CommentExportQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    return stream_ndjson(
+        Comment.objects.filter(**params.get_filters()),
+        COMMENT_EXPORT_FIELDS,
+        'comments.ndjson'
+    )
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def feed(request):
+    """Лента новых отзывов и комментариев по всему сайту"""
+    params = FeedQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    since = params.validated_data.get('since')
+    streams = {
+        'reviews': Review.objects.select_related('author', 'title'),
+        'comments': Comment.objects.select_related(
+            'author', 'review__title'
+        ),
+    }
+    if since is not None:
+        streams = {
+            name: queryset.filter(pub_date__gte=since)
+            for name, queryset in streams.items()
+        }
+    paginator = FeedPagination()
+    page = paginator.paginate_streams(streams, request)
+    serializers_map = {
+        'reviews': FeedReviewSerializer, 'comments': FeedCommentSerializer
+    }
+    context = {'request': request}
+    return paginator.get_paginated_response([
+        serializers_map[name](row, context=context).data
+        for name, row in page
+    ])
+
+
+@api_view(['GET'])
+@permission_classes([AdminOnly])
+def cache_stats(request):
+    """Попадания и размер кешей процесса, для подбора их размеров"""
+    return Response({
+        'titles': titles_cache.stats(),
+        'users': users_cache.stats(),
+    })
+
+
+@api_view(['POST'])
+@permission_classes([AdminOnly])
+def bulk_reviews(request):
+    """Пакетное добавление отзывов"""
+    check_bulk_items(request.data, settings.REVIEWS_BULK_SIZE, 'отзывов')
+    try:
+        results = save_reviews(request.data)
+    except IntegrityError:
+        raise serializers.ValidationError(
+            'Пакет пересекается с отзывами, добавленными одновременно '
+            'с ним. Повторите запрос.'
+        )
+    return Response(results, status=status.HTTP_200_OK)
+
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -89,7 +313,7 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer_class=BaseUserSerializer,
     )
     def get_edit_user(self, request):
-        user = request.user
+        user = get_object_or_404(User, pk=request.user.pk)
         serializer = self.get_serializer(user)
         if request.method == 'PATCH':
             serializer = self.get_serializer(
@@ -99,42 +323,105 @@ class UserViewSet(viewsets.ModelViewSet):
             serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def get_author_activity(self, queryset, serializer_class):
+        """Страница отзывов или комментариев автора, от новых к старым"""
+        author_id = get_object_or_404(
+            User.objects.values_list('pk', flat=True),
+            username=self.kwargs[self.lookup_field]
+        )
+        paginator = AuthorActivityPagination()
+        page = paginator.paginate_queryset(
+            queryset.filter(author_id=author_id), self.request, view=self
+        )
+        return paginator.get_paginated_response(serializer_class(
+            page, many=True, context=self.get_serializer_context()
+        ).data)
+
+    @action(detail=True, permission_classes=[ModeratorAdmin])
+    def reviews(self, request, username=None):
+        return self.get_author_activity(
+            Review.objects.select_related('author'), AuthorReviewSerializer
+        )
+
+    @action(detail=True, permission_classes=[ModeratorAdmin])
+    def comments(self, request, username=None):
+        return self.get_author_activity(
+            Comment.objects.select_related('author', 'review'),
+            AuthorCommentSerializer
+        )
 
-class CommentViewSet(viewsets.ModelViewSet):
+
+class CommentViewSet(TitleConditionMixin, WriteBehindMixin,
+                     viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     pagination_class = LimitOffsetPagination
     permission_classes = (AuthorModeratorAdminOrReadOnly,)
 
     def get_review(self):
-        return get_object_or_404(Review, pk=self.kwargs.get('review_id'))
+        """Отзыв из URL, если он относится к произведению из URL"""
+        return get_object_or_404(
+            Review,
+            pk=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id')
+        )
 
     def perform_create(self, serializer):
         serializer.save(
-            author=self.request.user,
+            author=get_request_author(self.request),
             review=self.get_review()
         )
 
+    def get_write_behind_fields(self, serializer):
+        return {
+            **serializer.validated_data,
+            'author_id': self.request.user.pk,
+            'review_id': self.get_review().pk,
+        }
+
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return Comment.objects.filter(
+            review=self.get_review()
+        ).select_related('author')
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(TitleConditionMixin, WriteBehindMixin,
+                    viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     pagination_class = LimitOffsetPagination
     permission_classes = (AuthorModeratorAdminOrReadOnly,
                           permissions.IsAuthenticatedOrReadOnly)
 
-    def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-
     def perform_create(self, serializer):
+        self.check_title_exists()
         serializer.save(
-            author=self.request.user,
-            title=self.get_title()
+            author=get_request_author(self.request),
+            title_id=self.kwargs.get('title_id')
         )
 
+    def get_write_behind_fields(self, serializer):
+        """Повтор отзыва проверяется до постановки в очередь; отзыв,
+        дублирующий ещё не записанный, отклонит ограничение при записи"""
+        self.check_title_exists()
+        title_id = self.kwargs.get('title_id')
+        if Review.objects.filter(
+            title_id=title_id, author_id=self.request.user.pk
+        ).exists():
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    ReviewSerializer.duplicate_message
+                ]
+            })
+        return {
+            **serializer.validated_data,
+            'author_id': self.request.user.pk,
+            'title_id': title_id,
+        }
+
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        self.check_title_exists()
+        return Review.objects.filter(
+            title_id=self.kwargs.get('title_id')
+        ).select_related('author')
 
 
 class GenreCategoryMixinsBaseClass(
@@ -160,13 +447,120 @@ class GenreViewsSet(GenreCategoryMixinsBaseClass):
 
 
 class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(rating=Avg('reviews__score'))
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
     permission_classes = (AdminReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = FilterTitle
+    pagination_class = TitlePagination
     ordering = ('-rating', 'name',)
 
     def get_serializer_class(self):
         if self.action in ("retrieve", "list"):
             return TitlesReadOnlySerializer
         return TitleEditSerializer
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        key = (
+            self.action,
+            kwargs.get(self.lookup_field),
+            request.get_host(),
+            request.is_secure(),
+            tuple(sorted(
+                (name, tuple(values))
+                for name, values in request.query_params.lists()
+            )),
+        )
+        version = get_request_titles_version(request)
+        data = titles_cache.get(key, version)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            titles_cache.set(key, response.data, version)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def get_values_queryset(self):
+        return TitleValuesSerializer.get_queryset(
+            self.filter_queryset(self.get_queryset())
+        )
+
+    def list_values(self, request, *args, **kwargs):
+        queryset = self.get_values_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                TitleValuesSerializer(page, many=True).data
+            )
+        return Response(TitleValuesSerializer(queryset, many=True).data)
+
+    def retrieve_values(self, request, *args, **kwargs):
+        row = generics.get_object_or_404(
+            self.get_values_queryset(),
+            **{self.lookup_field: kwargs[self.lookup_field]}
+        )
+        return Response(TitleValuesSerializer(row).data)
+
+    @method_decorator(condition(etag_func=titles_etag))
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            self.list_values, request, *args, **kwargs
+        )
+
+    @title_condition
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            self.retrieve_values, request, *args, **kwargs
+        )
+
+    @staticmethod
+    def get_histograms(title_ids):
+        return [
+            {'id': title_id, 'scores': scores}
+            for title_id, scores in ScoreCount.objects.histograms(
+                title_ids
+            ).items()
+        ]
+
+    @action(detail=True, url_path='score-histogram')
+    def score_histogram(self, request, pk=None):
+        try:
+            title_id = int(pk)
+        except ValueError:
+            raise Http404
+        if not Title.objects.filter(pk=title_id).exists():
+            raise Http404
+        return Response(self.get_histograms([title_id])[0])
+
+    @action(detail=False, url_path='score-histogram')
+    def score_histograms(self, request):
+        serializer = ScoreHistogramQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        title_ids = Title.objects.filter(
+            pk__in=serializer.validated_data['ids']
+        ).values_list('pk', flat=True)
+        return Response(self.get_histograms(sorted(title_ids)))
+
+    def trending_values(self, request, *args, **kwargs):
+        serializer = TrendingQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        rows = TitleValuesSerializer.get_queryset(
+            Title.objects.trending()[:serializer.validated_data['limit']]
+        )
+        return Response(TitleValuesSerializer(list(rows), many=True).data)
+
+    @action(detail=False)
+    @method_decorator(condition(etag_func=titles_etag))
+    def trending(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            self.trending_values, request, *args, **kwargs
+        )
+
+    @action(methods=['post'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        check_bulk_items(
+            request.data, settings.TITLES_BULK_SIZE, 'произведений'
+        )
+        return Response(save_titles(request.data), status=status.HTTP_200_OK)
@@ -0,0 +1,139 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import (
+    DatabaseError, IntegrityError, OperationalError, connections, transaction
+)
+
+logger = logging.getLogger(__name__)
+
+STOP = None
+
+
+class WriteBehindBuffer:
+    """Отложенная запись создаваемых объектов.
+
+    Запросы кладут в ограниченную очередь модель и значения полей, фоновый
+    поток записывает их пачками по batch_size, каждую строку в своей точке
+    сохранения: ошибка строки (например, нарушение ограничения
+    уникальности) пишется в лог и не отменяет остальные, а занятая база
+    (database is locked) приводит к повтору пачки с нарастающей паузой.
+    Принятая запись хранится только в памяти процесса: close() при
+    штатной остановке дописывает очередь, аварийное завершение её теряет.
+    """
+
+    retries = 5
+    retry_delay = 0.05
+
+    def __init__(self, max_size, batch_size):
+        self.queue = queue.Queue(max_size)
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.thread = None
+        self.written = 0
+        self.failed = 0
+
+    def put(self, model, fields):
+        """Ставит запись в очередь; False, если очередь заполнена"""
+        self.start()
+        try:
+            self.queue.put_nowait((model, fields))
+        except queue.Full:
+            return False
+        return True
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name='write-behind', daemon=True
+                )
+                self.thread.start()
+
+    def run(self):
+        try:
+            stop = False
+            while not stop:
+                batch = [self.queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = STOP in batch
+                self.write([item for item in batch if item is not STOP])
+                for _ in batch:
+                    self.queue.task_done()
+        finally:
+            connections.close_all()
+
+    def save(self, model, fields):
+        """Сохраняет запись в точке сохранения; False, если её отклонило
+        ограничение базы"""
+        try:
+            with transaction.atomic():
+                model.objects.create(**fields)
+            return True
+        except IntegrityError:
+            logger.exception(
+                'Отложенная запись %s отклонена: %s', model.__name__, fields
+            )
+            return False
+
+    def save_batch(self, batch):
+        with transaction.atomic():
+            return [self.save(model, fields) for model, fields in batch]
+
+    def with_retries(self, func, *args):
+        """Повторяет func, пока база занята другим писателем"""
+        for attempt in range(self.retries):
+            try:
+                return func(*args)
+            except OperationalError:
+                logger.warning('База занята, повтор отложенной записи')
+                time.sleep(self.retry_delay * 2 ** attempt)
+        return func(*args)
+
+    def write(self, batch):
+        """Пачка пишется в одной транзакции. Если её отклонила база при
+        фиксации (в SQLite так проверяются внешние ключи), записи
+        сохраняются по одной."""
+        if not batch:
+            return
+        try:
+            try:
+                results = self.with_retries(self.save_batch, batch)
+            except IntegrityError:
+                results = [
+                    self.with_retries(self.save, model, fields)
+                    for model, fields in batch
+                ]
+        except DatabaseError:
+            logger.exception(
+                'Пачка из %s отложенных записей не сохранена', len(batch)
+            )
+            results = [False] * len(batch)
+        self.written += results.count(True)
+        self.failed += results.count(False)
+
+    def flush(self):
+        """Ждёт записи всего, что уже стоит в очереди"""
+        self.queue.join()
+
+    def close(self):
+        """Дописывает очередь и останавливает поток"""
+        with self.lock:
+            thread = self.thread
+        if thread is not None and thread.is_alive():
+            self.queue.put(STOP)
+            thread.join()
+
+
+write_buffer = WriteBehindBuffer(
+    settings.WRITE_BEHIND_QUEUE_SIZE, settings.WRITE_BEHIND_BATCH_SIZE
+)
+atexit.register(write_buffer.close)
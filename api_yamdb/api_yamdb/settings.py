@@ -115,9 +115,20 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static/'),)
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'email'
 
+# Письма регистрации ставятся в таблицу OutboxEmail и отправляются командой
+# send_outbox; после неудачи пауза удваивается от OUTBOX_RETRY_DELAY секунд.
+# Перед отправкой письмо занимается на OUTBOX_LEASE секунд, чтобы его не
+# отправил параллельный обработчик.
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_LEASE = 5 * 60
+OUTBOX_POLL_INTERVAL = 5
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_RETRY_DELAY = 30
+OUTBOX_RETRY_MAX_DELAY = 60 * 60
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
@@ -127,13 +138,38 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': '20/min',
+        'auth_identity': '5/min',
+        'auth_code': '5/min',
+    },
+    # Адрес клиента берётся из REMOTE_ADDR, X-Forwarded-For не доверяем.
+    # За обратным прокси указать число прокси перед приложением.
+    'NUM_PROXIES': 0,
 }
 
+# Счётчики ограничения частоты регистрации и получения токена: отдельный
+# файл SQLite, общий для всех процессов-обработчиков на машине.
+THROTTLE_DB_PATH = BASE_DIR / 'throttle.sqlite3'
+THROTTLE_DB_TIMEOUT = 5
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Токены с ролью: права проверяются по утверждениям токена без загрузки
+# пользователя. Смена роли отзывает токен не позже чем через
+# ROLE_VERSION_CACHE_TIMEOUT секунд (сразу при общем бэкенде CACHES).
+JWT_ROLE_CLAIMS = True
+ROLE_VERSION_CACHE_TIMEOUT = 60
+
+# Кеш пользователей для токенов без роли (CachedJWTAuthentication). Запись
+# сверяется с версией прав, поэтому смена роли в другом процессе действует
+# так же быстро, как для токенов с ролью.
+USERS_CACHE_SIZE = 4096
+USERS_CACHE_TTL = 300
+
 ADMIN_EMAIL = 'admin@mail.com'
 FORBIDDEN_USERNAME = 'me'
 
@@ -147,3 +183,25 @@ LEN_FOR_SLUG = 50
 
 MIN_SCORE_VALUE = 1
 MAX_SCORE_VALUE = 10
+
+TITLES_CACHE_SIZE = 1024
+TITLES_CACHE_TTL = 300
+TITLES_BULK_SIZE = 1000
+REVIEWS_BULK_SIZE = 1000
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Популярность произведения: сумма оценок отзывов, вклад каждого
+# вдвое падает за TRENDING_HALF_LIFE секунд. После изменения периода ключи
+# популярности пересчитывает команда rebuild_aggregates. Произведения с
+# популярностью ниже TRENDING_MIN_SCORE в список популярных не попадают.
+TRENDING_HALF_LIFE = 3 * 24 * 60 * 60
+TRENDING_MIN_SCORE = 0.01
+TRENDING_LIMIT = 10
+TRENDING_MAX_LIMIT = 100
+
+# Отложенная запись отзывов и комментариев: POST отвечает 202, запись
+# делает фоновый поток пачками. При заполненной очереди запись прямая.
+WRITE_BEHIND_ENABLED = False
+WRITE_BEHIND_QUEUE_SIZE = 10000
+WRITE_BEHIND_BATCH_SIZE = 500
@@ -1,6 +1,8 @@
 from django.contrib import admin
 
-from .models import Category, Genre, Title, Review, Comment, User
+from .models import (
+    Category, Genre, Title, Review, Comment, OutboxEmail, User
+)
 
 admin.site.register(Category)
 admin.site.register(Genre)
@@ -8,3 +10,4 @@ admin.site.register(Title)
 admin.site.register(Review)
 admin.site.register(Comment)
 admin.site.register(User)
+admin.site.register(OutboxEmail)
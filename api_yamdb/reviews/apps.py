@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        from reviews import signals  # noqa: F401
+        from reviews.search import install_title_search
+
+        post_migrate.connect(install_title_search, sender=self)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import TITLES_VERSION, CacheVersion, Review, Title
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild title ratings, score histograms, trending scores and '
+        'review comment counts'
+    )
+
+    def handle(self, *args, **kwargs):
+        updated = Title.objects.all().recalculate_scores()
+        Title.objects.all().recalculate_trending()
+        self.stdout.write(
+            self.style.SUCCESS(f'{updated} titles recalculated')
+        )
+        updated = Review.objects.all().recalculate_comment_counts()
+        CacheVersion.objects.bump(TITLES_VERSION)
+        self.stdout.write(
+            self.style.SUCCESS(f'{updated} reviews recalculated')
+        )
@@ -0,0 +1,76 @@
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.models import OutboxEmail
+
+
+class Command(BaseCommand):
+    help = (
+        'Send queued e-mails from the outbox in batches over one mail '
+        'backend connection, retrying failures with exponential backoff'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep polling the outbox instead of exiting when drained'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=settings.OUTBOX_POLL_INTERVAL,
+            help='Seconds between polls in --loop mode'
+        )
+
+    def handle(self, *args, batch_size, loop, interval, **kwargs):
+        while True:
+            try:
+                sent, failed = self.drain(batch_size)
+            except OSError as error:
+                if not loop:
+                    raise CommandError(f'Mail backend failed: {error}')
+                self.stderr.write(f'Mail backend failed: {error}')
+            else:
+                if sent or failed or not loop:
+                    self.stdout.write(self.style.SUCCESS(
+                        f'{sent} e-mails sent, {failed} postponed'
+                    ))
+            if not loop:
+                return
+            time.sleep(interval)
+
+    def drain(self, batch_size):
+        """Отправляет все письма, которые пора отправить.
+
+        Каждое письмо занимается перед отправкой и удаляется сразу после
+        неё: параллельные обработчики не отправляют одно письмо дважды, а
+        сбой посреди пакета не приводит к повторной отправке уже
+        доставленных. Ошибка одного письма откладывает только его.
+        """
+        sent = failed = 0
+        with get_connection() as connection:
+            while True:
+                batch = list(OutboxEmail.objects.due()[:batch_size])
+                if not batch:
+                    return sent, failed
+                for email in batch:
+                    if not email.claim():
+                        continue
+                    try:
+                        if not connection.send_messages([EmailMessage(
+                            subject=email.subject,
+                            body=email.message,
+                            from_email=settings.DEFAULT_FROM_EMAIL,
+                            to=[email.recipient],
+                        )]):
+                            raise OSError('message was not accepted')
+                    except Exception as error:
+                        email.schedule_retry(error)
+                        failed += 1
+                    else:
+                        email.delete()
+                        sent += 1
@@ -0,0 +1,30 @@
+# Generated by Django 3.2 on 2026-10-18 01:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_scorecount'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['review', '-pub_date'], name='comment_review_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['title', '-pub_date'], name='review_title_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year'], name='title_year_idx'),
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX "title_genre_genre_title_idx" '
+            'ON "reviews_title_genre" ("genre_id", "title_id");',
+            reverse_sql='DROP INDEX "title_genre_genre_title_idx";',
+        ),
+    ]
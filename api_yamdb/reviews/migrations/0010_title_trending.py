@@ -0,0 +1,51 @@
+# Generated by Django 3.2 on 2026-10-18 01:36
+
+import math
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_trending(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    now = time.time()
+    scores = defaultdict(float)
+    for title_id, score, pub_date in Review.objects.filter(
+        pub_date__isnull=False
+    ).values_list('title_id', 'score', 'pub_date').iterator():
+        scores[title_id] += score * math.exp(
+            (pub_date.timestamp() - now)
+            * math.log(2) / settings.TRENDING_HALF_LIFE
+        )
+    for title_id, score in scores.items():
+        Title.objects.filter(pk=title_id).update(
+            trending_score=score, trending_at=now
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='trending_at',
+            field=models.FloatField(default=0, editable=False, verbose_name='Время расчёта популярности (unix)'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Популярность'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['-trending_score', 'id'], name='title_trending_idx'),
+        ),
+        migrations.RunPython(fill_trending, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.2 on 2026-10-18 02:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    # Таблица и индекс title_genre_genre_title_idx (0006) уже есть в базе;
+    # явная модель связи вносит индекс в состояние моделей, и SQLite
+    # сохраняет его при пересоздании таблицы.
+
+    dependencies = [
+        ('reviews', '0013_cache_version'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='TitleGenre',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('genre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reviews.genre')),
+                        ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reviews.title')),
+                    ],
+                    options={
+                        'verbose_name': 'Жанр произведения',
+                        'verbose_name_plural': 'Жанры произведений',
+                        'db_table': 'reviews_title_genre',
+                        'unique_together': {('title', 'genre')},
+                    },
+                ),
+                migrations.AddIndex(
+                    model_name='titlegenre',
+                    index=models.Index(fields=['genre', 'title'], name='title_genre_genre_title_idx'),
+                ),
+                migrations.AlterField(
+                    model_name='title',
+                    name='genre',
+                    field=models.ManyToManyField(through='reviews.TitleGenre', to='reviews.Genre', verbose_name='Жанр'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 3.2 on 2026-10-18 02:23
+
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+
+# 2020-01-01 UTC, как TRENDING_EPOCH в reviews.models.
+EPOCH = 1577836800
+
+
+def fill_trending_key(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    logs = defaultdict(list)
+    for title_id, score, pub_date in Review.objects.filter(
+        pub_date__isnull=False
+    ).values_list('title_id', 'score', 'pub_date').iterator():
+        logs[title_id].append(
+            math.log(score) + (pub_date.timestamp() - EPOCH)
+            * math.log(2) / settings.TRENDING_HALF_LIFE
+        )
+    for title_id, values in logs.items():
+        top = max(values)
+        Title.objects.filter(pk=title_id).update(trending_key=top + math.log(
+            math.fsum(math.exp(value - top) for value in values)
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0014_title_genre_through'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='title',
+            name='title_trending_idx',
+        ),
+        migrations.RemoveField(
+            model_name='title',
+            name='trending_at',
+        ),
+        migrations.RemoveField(
+            model_name='title',
+            name='trending_score',
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='trending_key',
+            field=models.FloatField(editable=False, null=True, verbose_name='Ключ популярности'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['-trending_key', 'id'], name='title_trending_idx'),
+        ),
+        migrations.RunPython(fill_trending_key, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,27 @@
+import math
+import time
+from collections import defaultdict
+from datetime import timedelta
+from functools import reduce
+from operator import and_
+
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import (
     MaxValueValidator, MinValueValidator,
 )
-from django.db import models
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import (
+    Avg, Case, Count, F, OuterRef, Q, Subquery, Sum, Value, When
+)
+from django.db.models.functions import (
+    Cast, Coalesce, Exp, Greatest, Ln, NullIf
+)
+from django.utils import timezone
 
+from reviews.search import (
+    TITLE_SEARCH_TABLE, build_match_query, search_tokens
+)
 from reviews.validators import validate_year, validate_username
 
 
@@ -51,6 +68,51 @@ class User(AbstractUser):
         verbose_name='О себе',
         blank=True
     )
+    role_version = models.PositiveIntegerField(
+        verbose_name='Версия прав',
+        default=0,
+        editable=False
+    )
+
+    # Поля, от которых зависят права; их изменение отзывает выданные
+    # токены с ролью.
+    access_fields = ('role', 'is_staff', 'is_superuser', 'is_active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(field in field_names for field in cls.access_fields):
+            instance.remember_access()
+        if 'username' in field_names:
+            instance.remember_username()
+        return instance
+
+    def remember_access(self):
+        """Запоминает сохранённые в базе поля прав"""
+        self._saved_access = self.get_access()
+
+    def remember_username(self):
+        """Запоминает сохранённое в базе имя; по нему обработчик post_save
+        узнаёт о переименовании"""
+        self._saved_username = self.username
+
+    @property
+    def saved_username(self):
+        return getattr(self, '_saved_username', None)
+
+    def get_access(self):
+        return tuple(getattr(self, field) for field in self.access_fields)
+
+    def save(self, *args, **kwargs):
+        saved_access = getattr(self, '_saved_access', None)
+        if saved_access is not None and saved_access != self.get_access():
+            self.role_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'role_version'}
+        super().save(*args, **kwargs)
+        self.remember_access()
+        self.remember_username()
 
     @property
     def is_admin(self):
@@ -101,7 +163,196 @@ class Genre(GenreCategoryBaseClass):
         verbose_name_plural = 'Жанры'
 
 
-class Title(models.Model):
+# Начало отсчёта ключа популярности, 2020-01-01 UTC.
+TRENDING_EPOCH = 1577836800
+# Остаток вклада, ниже которого вычитание отзыва считается удалением
+# последнего вклада: так Ln не получает ноль из-за погрешности.
+TRENDING_KEY_PRECISION = 1e-9
+
+
+def trending_time(timestamp):
+    """Время от TRENDING_EPOCH в единицах, за которые вклад падает в e раз"""
+    return (
+        (timestamp - TRENDING_EPOCH) * math.log(2)
+        / settings.TRENDING_HALF_LIFE
+    )
+
+
+def trending_log(scores):
+    """Ключ популярности по парам (оценка, время): логарифм суммы
+    оценок, приведённых к TRENDING_EPOCH, без переполнения"""
+    logs = [math.log(score) + trending_time(since) for score, since in scores]
+    if not logs:
+        return None
+    top = max(logs)
+    return top + math.log(math.fsum(math.exp(log - top) for log in logs))
+
+
+class TitleQuerySet(models.QuerySet):
+
+    def change_scores(self, score_delta, count_delta, trending_delta=0,
+                      since=None):
+        """Инкрементально меняет сумму оценок, число отзывов и рейтинг.
+
+        Ненулевой trending_delta — изменение оценки отзыва, оставленного
+        в момент since (по умолчанию сейчас); на него в том же UPDATE
+        меняется ключ популярности.
+        """
+        score_sum = F('score_sum') + score_delta
+        review_count = F('review_count') + count_delta
+        fields = {}
+        if trending_delta:
+            fields['trending_key'] = Case(
+                When(
+                    review_count__gt=-count_delta,
+                    then=self.trending_key_change(trending_delta, since)
+                ),
+                default=None,
+                output_field=models.FloatField()
+            )
+        return self.update(
+            score_sum=score_sum,
+            review_count=review_count,
+            rating=(
+                Cast(score_sum, models.FloatField())
+                / NullIf(review_count, 0)
+            ),
+            modified=timezone.now(),
+            **fields
+        )
+
+    @staticmethod
+    def trending_key_change(delta, since=None):
+        """Новый ключ популярности после добавления delta к сумме оценок.
+
+        Ключ — ln(Σ score·e^t), где t = trending_time(pub_date): логарифм
+        суммы и его изменение считаются относительно большего слагаемого.
+        """
+        key = F('trending_key')
+        change = math.log(abs(delta)) + trending_time(
+            time.time() if since is None else since
+        )
+        if delta > 0:
+            top = Greatest(key, Value(change))
+            return Case(
+                When(trending_key__isnull=True, then=Value(change)),
+                default=top + Ln(Exp(key - top) + Exp(change - top)),
+                output_field=models.FloatField()
+            )
+        return Case(
+            When(
+                trending_key__gt=change - math.log1p(-TRENDING_KEY_PRECISION),
+                then=key + Ln(1.0 - Exp(change - key))
+            ),
+            default=None,
+            output_field=models.FloatField()
+        )
+
+    def trending(self):
+        """Произведения от самых популярных на текущий момент.
+
+        Порядок ключей со временем не меняется, поэтому его задаёт индекс
+        без периодического пересчёта; произведения, популярность которых
+        упала ниже TRENDING_MIN_SCORE, не попадают в выборку.
+        """
+        return self.filter(trending_key__gt=(
+            math.log(settings.TRENDING_MIN_SCORE) + trending_time(time.time())
+        )).order_by('-trending_key', 'id')
+
+    def recalculate_trending(self):
+        """Пересчитывает ключ популярности по времени и оценкам отзывов"""
+        scores = defaultdict(list)
+        for title_id, score, pub_date in Review.objects.filter(
+            title__in=self, pub_date__isnull=False
+        ).order_by().values_list('title_id', 'score', 'pub_date').iterator():
+            scores[title_id].append((score, pub_date.timestamp()))
+        titles = list(self.only('pk'))
+        for title in titles:
+            title.trending_key = trending_log(scores.get(title.pk, ()))
+        return self.model.objects.bulk_update(
+            titles, ['trending_key'], batch_size=settings.TITLES_BULK_SIZE
+        )
+
+    def touch(self):
+        """Отмечает изменение произведений или вложенных в них ресурсов"""
+        return self.update(modified=timezone.now())
+
+    def search(self, query):
+        """Поиск по словам и префиксам названия, сначала самые релевантные"""
+        tokens = search_tokens(query)
+        if not tokens:
+            return self.none()
+        if connections[self.db].vendor != 'sqlite':
+            return self.filter(reduce(and_, (
+                Q(name__icontains=token) for token in tokens
+            )))
+        table = self.model._meta.db_table
+        return self.extra(
+            tables=[TITLE_SEARCH_TABLE],
+            where=[
+                f'{TITLE_SEARCH_TABLE}.rowid = {table}.id',
+                f'{TITLE_SEARCH_TABLE} MATCH %s',
+            ],
+            params=[build_match_query(tokens)],
+            select={'search_rank': f'{TITLE_SEARCH_TABLE}.rank'},
+            order_by=['search_rank', 'id'],
+        )
+
+    def recalculate_scores(self):
+        """Пересчитывает рейтинг и гистограмму оценок по всем отзывам"""
+        ScoreCount.objects.filter(title__in=self).delete()
+        ScoreCount.objects.bulk_create(
+            ScoreCount(
+                title_id=row['title'], score=row['score'], count=row['total']
+            )
+            for row in Review.objects.filter(
+                title__in=self
+            ).order_by().values('title', 'score').annotate(total=Count('pk'))
+        )
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return self.update(
+            score_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0
+            ),
+            review_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk')).values('total')),
+                0
+            ),
+            rating=Subquery(
+                reviews.annotate(average=Avg('score')).values('average')
+            ),
+            modified=timezone.now(),
+        )
+
+
+class CounterFieldsMixin:
+    """Сохранение существующей записи не пишет поля counter_fields.
+
+    Счётчики меняют только инкрементальные UPDATE и пересчёт; экземпляр,
+    загруженный до такого UPDATE, иначе затёр бы его своими значениями.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            self.counter_fields and not self._state.adding
+            and not kwargs.get('force_insert')
+            and kwargs.get('update_fields') is None
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+
+class Title(CounterFieldsMixin, models.Model):
     name = models.CharField(
         max_length=256,
         verbose_name='Название'
@@ -117,6 +368,7 @@ class Title(models.Model):
     )
     genre = models.ManyToManyField(
         Genre,
+        through='TitleGenre',
         verbose_name='Жанр'
     )
     category = models.ForeignKey(
@@ -127,17 +379,83 @@ class Title(models.Model):
         verbose_name='Категория',
         related_name='titles'
     )
+    rating = models.FloatField(
+        verbose_name='Рейтинг',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    review_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False
+    )
+    modified = models.DateTimeField(
+        verbose_name='Время изменения',
+        auto_now=True
+    )
+    trending_key = models.FloatField(
+        verbose_name='Ключ популярности',
+        null=True,
+        editable=False
+    )
+
+    objects = TitleQuerySet.as_manager()
+
+    counter_fields = ('rating', 'score_sum', 'review_count', 'trending_key')
 
     class Meta:
         ordering = ('name',)
+        indexes = [
+            models.Index(
+                fields=['-rating', 'name', 'id'],
+                name='title_rating_name_idx'
+            ),
+            models.Index(fields=['year'], name='title_year_idx'),
+            models.Index(
+                fields=['-trending_key', 'id'], name='title_trending_idx'
+            ),
+        ]
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
 
     def __str__(self):
         return self.name[:30]
 
+    @property
+    def trending_score(self):
+        """Популярность на текущий момент: сумма затухших оценок"""
+        if self.trending_key is None:
+            return 0
+        return math.exp(self.trending_key - trending_time(time.time()))
+
+
+class TitleGenre(models.Model):
+    """Связь произведения с жанром; таблица прежней автоматической связи"""
+    title = models.ForeignKey(Title, on_delete=models.CASCADE)
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = 'reviews_title_genre'
+        unique_together = ('title', 'genre')
+        indexes = [
+            models.Index(
+                fields=['genre', 'title'], name='title_genre_genre_title_idx'
+            ),
+        ]
+        verbose_name = 'Жанр произведения'
+        verbose_name_plural = 'Жанры произведений'
+
+    def __str__(self):
+        return f'{self.title_id}: {self.genre_id}'
 
-class TextAuthorPubDate(models.Model):
+
+class TextAuthorPubDate(CounterFieldsMixin, models.Model):
     pub_date = models.DateTimeField(
         verbose_name='Время добавления',
         auto_now_add=True,
@@ -154,12 +472,39 @@ class TextAuthorPubDate(models.Model):
     def __str__(self):
         return f'{self.author.username}: {self.text[:15]}'
 
+    def save(self, *args, **kwargs):
+        """Запись и обновление счётчиков в обработчиках post_save
+        выполняются в одной транзакции. Удаление уже атомарно: сигналы
+        post_delete Django шлёт внутри транзакции удаления."""
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
     class Meta:
         abstract = True
         ordering = ('-pub_date',)
         default_related_name = '%(class)ss'
 
 
+class ReviewQuerySet(models.QuerySet):
+
+    def change_comment_count(self, delta):
+        """Инкрементально меняет число комментариев к отзывам"""
+        return self.update(comment_count=F('comment_count') + delta)
+
+    def recalculate_comment_counts(self):
+        """Пересчитывает число комментариев по таблице комментариев"""
+        return self.update(comment_count=Coalesce(
+            Subquery(
+                Comment.objects.filter(
+                    review=OuterRef('pk')
+                ).order_by().values('review').annotate(
+                    total=Count('pk')
+                ).values('total')
+            ),
+            0
+        ))
+
+
 class Review(TextAuthorPubDate):
     title = models.ForeignKey(
         to=Title,
@@ -174,10 +519,47 @@ class Review(TextAuthorPubDate):
         ],
         verbose_name='Оценка',
     )
+    comment_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False
+    )
+
+    objects = ReviewQuerySet.as_manager()
+
+    counter_fields = ('comment_count',)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'title_id' in field_names and 'score' in field_names:
+            instance.remember_score()
+        return instance
+
+    def remember_score(self):
+        """Запоминает сохранённые в базе произведение и оценку"""
+        self._saved_score = (self.title_id, self.score)
+
+    @property
+    def saved_score(self):
+        return getattr(self, '_saved_score', None)
 
     class Meta(TextAuthorPubDate.Meta):
         verbose_name = 'Ревью'
         verbose_name_plural = 'Ревью'
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date'],
+                name='review_title_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='review_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['-pub_date', '-id'], name='review_pub_date_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['title', 'author'],
@@ -196,3 +578,200 @@ class Comment(TextAuthorPubDate):
     class Meta(TextAuthorPubDate.Meta):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date'],
+                name='comment_review_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='comment_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['-pub_date', '-id'], name='comment_pub_date_idx'
+            ),
+        ]
+
+
+class ScoreCountQuerySet(models.QuerySet):
+
+    def change(self, title_id, score, delta):
+        """Инкрементально меняет счётчик отзывов с оценкой score"""
+        counters = self.filter(title_id=title_id, score=score)
+        if counters.update(count=F('count') + delta) or delta <= 0:
+            return
+        try:
+            with transaction.atomic(using=self.db):
+                self.create(title_id=title_id, score=score, count=delta)
+        except IntegrityError:
+            counters.update(count=F('count') + delta)
+
+    def histograms(self, title_ids):
+        """Гистограммы оценок {title_id: {score: count}} за один запрос"""
+        histograms = {
+            title_id: dict.fromkeys(
+                range(settings.MIN_SCORE_VALUE, settings.MAX_SCORE_VALUE + 1),
+                0
+            )
+            for title_id in title_ids
+        }
+        for title_id, score, count in self.filter(
+            title_id__in=title_ids
+        ).values_list('title_id', 'score', 'count'):
+            histograms[title_id][score] = count
+        return histograms
+
+
+class ScoreCount(models.Model):
+    """Количество отзывов на произведение с данной оценкой"""
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        verbose_name='Произведение',
+        related_name='score_counts'
+    )
+    score = models.SmallIntegerField(verbose_name='Оценка')
+    count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0
+    )
+
+    objects = ScoreCountQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Количество оценок'
+        verbose_name_plural = 'Количество оценок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'score'],
+                name='unique_title_score'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.title_id}: {self.score} x {self.count}'
+
+
+TITLES_VERSION = 'titles'
+
+
+class CacheVersionQuerySet(models.QuerySet):
+
+    def get_value(self, name):
+        """Текущая версия; до первого изменения — 0"""
+        return self.filter(name=name).values_list(
+            'value', flat=True
+        ).first() or 0
+
+    def bump(self, name):
+        """Увеличивает версию, создавая запись при первом изменении"""
+        versions = self.filter(name=name)
+        if versions.update(value=F('value') + 1):
+            return
+        try:
+            with transaction.atomic(using=self.db):
+                self.create(name=name, value=1)
+        except IntegrityError:
+            versions.update(value=F('value') + 1)
+
+
+class CacheVersion(models.Model):
+    """Версия данных для кешей процессов.
+
+    Хранится в базе, поэтому изменение, сделанное одним процессом,
+    сразу видно всем остальным.
+    """
+    name = models.CharField(
+        max_length=50,
+        primary_key=True,
+        verbose_name='Название'
+    )
+    value = models.PositiveBigIntegerField(
+        verbose_name='Версия',
+        default=0
+    )
+
+    objects = CacheVersionQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Версия кеша'
+        verbose_name_plural = 'Версии кешей'
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
+
+
+class OutboxEmailQuerySet(models.QuerySet):
+
+    def due(self):
+        """Письма, которые пора отправить, в порядке очереди"""
+        return self.filter(
+            next_attempt_at__lte=timezone.now(),
+            attempts__lt=settings.OUTBOX_MAX_ATTEMPTS
+        ).order_by('next_attempt_at', 'id')
+
+
+class OutboxEmail(models.Model):
+    """Письмо, ожидающее отправки командой send_outbox"""
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    message = models.TextField(verbose_name='Текст')
+    recipient = models.EmailField(
+        max_length=settings.LEN_EMAIL,
+        verbose_name='Получатель'
+    )
+    created = models.DateTimeField(
+        verbose_name='Время добавления',
+        auto_now_add=True
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Неудачных попыток',
+        default=0
+    )
+    next_attempt_at = models.DateTimeField(
+        verbose_name='Время следующей попытки',
+        default=timezone.now
+    )
+    last_error = models.TextField(verbose_name='Последняя ошибка', blank=True)
+
+    objects = OutboxEmailQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at', 'id'],
+                name='outbox_next_attempt_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject[:30]}'
+
+    def claim(self):
+        """Занимает письмо на OUTBOX_LEASE секунд условным UPDATE.
+
+        False, если его уже занял или отправил другой обработчик. Если
+        обработчик остановится, не отправив письмо, оно вернётся в очередь
+        по истечении срока.
+        """
+        lease_until = timezone.now() + timedelta(
+            seconds=settings.OUTBOX_LEASE
+        )
+        claimed = OutboxEmail.objects.filter(
+            pk=self.pk, next_attempt_at=self.next_attempt_at
+        ).update(next_attempt_at=lease_until)
+        if claimed:
+            self.next_attempt_at = lease_until
+        return bool(claimed)
+
+    def schedule_retry(self, error):
+        """Откладывает отправку, удваивая паузу после каждой неудачи"""
+        delay = min(
+            settings.OUTBOX_RETRY_DELAY * 2 ** self.attempts,
+            settings.OUTBOX_RETRY_MAX_DELAY
+        )
+        self.attempts += 1
+        self.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        self.last_error = str(error)
+        self.save(update_fields=['attempts', 'next_attempt_at', 'last_error'])
@@ -0,0 +1,72 @@
+import re
+
+from django.db import connections
+
+TITLE_SEARCH_TABLE = 'reviews_title_search'
+MAX_SEARCH_TOKENS = 10
+
+TITLE_SEARCH_SQL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TITLE_SEARCH_TABLE} USING fts5(
+        name,
+        content='reviews_title',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TITLE_SEARCH_TABLE}_insert
+    AFTER INSERT ON reviews_title BEGIN
+        INSERT INTO {TITLE_SEARCH_TABLE}(rowid, name)
+        VALUES (new.id, new.name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TITLE_SEARCH_TABLE}_delete
+    AFTER DELETE ON reviews_title BEGIN
+        INSERT INTO {TITLE_SEARCH_TABLE}({TITLE_SEARCH_TABLE}, rowid, name)
+        VALUES ('delete', old.id, old.name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TITLE_SEARCH_TABLE}_update
+    AFTER UPDATE OF name ON reviews_title BEGIN
+        INSERT INTO {TITLE_SEARCH_TABLE}({TITLE_SEARCH_TABLE}, rowid, name)
+        VALUES ('delete', old.id, old.name);
+        INSERT INTO {TITLE_SEARCH_TABLE}(rowid, name)
+        VALUES (new.id, new.name);
+    END""",
+)
+
+
+def search_tokens(query):
+    return re.findall(r'\w+', query)[:MAX_SEARCH_TOKENS]
+
+
+def build_match_query(tokens):
+    """Запрос FTS5: каждое слово ищется как префикс,
+    все слова должны встретиться в названии."""
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def install_title_search(using='default', **kwargs):
+    """Создаёт индекс FTS5 по названиям произведений и триггеры,
+    синхронизирующие его с reviews_title.
+
+    SQLite пересоздаёт таблицу при изменении схемы и теряет триггеры,
+    поэтому установка повторяется после каждой миграции; если триггеры
+    пришлось создать заново, индекс перестраивается целиком.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    if 'reviews_title' not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM sqlite_master "
+            "WHERE type = 'trigger' AND name LIKE %s",
+            (f'{TITLE_SEARCH_TABLE}_%',)
+        )
+        (installed,) = cursor.fetchone()
+        if installed == len(TITLE_SEARCH_SQL) - 1:
+            return
+        for statement in TITLE_SEARCH_SQL:
+            cursor.execute(statement)
+        cursor.execute(
+            f"INSERT INTO {TITLE_SEARCH_TABLE}({TITLE_SEARCH_TABLE}) "
+            "VALUES ('rebuild')"
+        )
@@ -0,0 +1,107 @@
+from django.db.models import Q
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete
+)
+from django.dispatch import receiver
+
+from reviews.models import (
+    Category, Comment, Genre, Review, ScoreCount, Title, User
+)
+
+
+def add_score(title_id, score, count=1, pub_date=None):
+    """Меняет счётчики произведения; с pub_date отзыва — и популярность"""
+    Title.objects.filter(pk=title_id).change_scores(
+        score * count, count,
+        trending_delta=score * count if pub_date else 0,
+        since=pub_date.timestamp() if pub_date else None
+    )
+    ScoreCount.objects.change(title_id, score, count)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = instance.saved_score
+    if created:
+        add_score(instance.title_id, instance.score,
+                  pub_date=instance.pub_date)
+    elif previous is None:
+        Title.objects.filter(pk=instance.title_id).recalculate_scores()
+    elif previous != (instance.title_id, instance.score):
+        add_score(*previous, count=-1, pub_date=instance.pub_date)
+        add_score(instance.title_id, instance.score,
+                  pub_date=instance.pub_date)
+    else:
+        Title.objects.filter(pk=instance.title_id).touch()
+    instance.remember_score()
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    add_score(instance.title_id, instance.score, count=-1,
+              pub_date=instance.pub_date)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        Review.objects.filter(pk=instance.review_id).change_comment_count(1)
+    Title.objects.filter(reviews=instance.review_id).touch()
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    Review.objects.filter(pk=instance.review_id).change_comment_count(-1)
+    Title.objects.filter(reviews=instance.review_id).touch()
+
+
+@receiver(post_save, sender=User)
+def user_renamed(sender, instance, created, raw=False, **kwargs):
+    """Имя автора входит в отзывы и комментарии: после переименования
+    отмечаются изменёнными произведения, где он их оставил"""
+    if raw or created:
+        return
+    if instance.saved_username in (None, instance.username):
+        return
+    Title.objects.filter(
+        Q(pk__in=Review.objects.filter(
+            author=instance
+        ).values('title_id'))
+        | Q(pk__in=Review.objects.filter(
+            comments__author=instance
+        ).values('title_id'))
+    ).touch()
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def category_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    Title.objects.filter(category=instance).touch()
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def genre_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    Title.objects.filter(genre=instance).touch()
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        titles = Title.objects.filter(pk=instance.pk)
+    elif pk_set:
+        titles = Title.objects.filter(pk__in=pk_set)
+    else:
+        titles = Title.objects.filter(genre=instance)
+    titles.touch()
@@ -0,0 +1,109 @@
+"""Регистрация пользователей при параллельных POST-запросах.
+
+Каждый поток регистрирует новых пользователей; часть запросов повторяет
+уже отправленную регистрацию (код отправляется заново) или занимает чужой
+username (ошибка 400).
+
+Запуск из корня репозитория:
+    python benchmarks/bench_signup.py [--threads 16] [--requests 100]
+"""
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import django_env
+
+
+def get_payloads(thread, count):
+    payloads = []
+    for idx in range(count):
+        if idx % 5 == 3:
+            # Повтор регистрации с теми же данными.
+            username = f'user{thread}_{idx - 1}'
+            email = f'{username}@ya.ru'
+        elif idx % 5 == 4:
+            # Чужой username с новым email.
+            username = f'user{thread}_{idx - 2}'
+            email = f'conflict{thread}_{idx}@ya.ru'
+        else:
+            username = f'user{thread}_{idx}'
+            email = f'{username}@ya.ru'
+        payloads.append({'username': username, 'email': email})
+    return payloads
+
+
+def post_signups(payloads, latencies, statuses):
+    from django.db import connections
+    from rest_framework.test import APIClient
+    # Исключения не пробрасываются: сигнал got_request_exception общий
+    # для всех потоков, и клиент получил бы чужую ошибку.
+    client = APIClient(raise_request_exception=False)
+    try:
+        for data in payloads:
+            start = time.perf_counter()
+            response = client.post('/api/v1/auth/signup/', data)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+    finally:
+        connections.close_all()
+
+
+def run(threads, count):
+    from reviews.models import OutboxEmail, User
+    latencies, statuses = [], Counter()
+    workers = [
+        threading.Thread(
+            target=post_signups,
+            args=(get_payloads(thread, count), latencies, statuses)
+        )
+        for thread in range(threads)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'statuses': dict(sorted(statuses.items())),
+        'users': User.objects.count(),
+        'emails': OutboxEmail.objects.count(),
+        'rate': len(latencies) / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=100)
+    args = parser.parse_args()
+    django_env.setup()
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    from django.conf import settings
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {
+            'auth_ip': None, 'auth_identity': None,
+        }
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        settings.THROTTLE_DB_PATH = os.path.join(directory, 'throttle.db')
+        with django_env.test_database(os.path.join(directory, 'bench.db')):
+            result = run(args.threads, args.requests)
+    print(f'Потоков: {args.threads}, запросов на поток: {args.requests}')
+    print(
+        f'ответы {result["statuses"]}; пользователей {result["users"]}, '
+        f'писем в очереди {result["emails"]}; {result["rate"]:.0f} отв/с; '
+        f'p50 {result["p50"]:.1f} мс, p99 {result["p99"]:.1f} мс'
+    )
+
+
+if __name__ == '__main__':
+    main()
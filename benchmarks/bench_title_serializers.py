@@ -0,0 +1,90 @@
+"""Сравнение TitlesReadOnlySerializer и TitleValuesSerializer.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_title_serializers.py [--titles 10000]
+"""
+import argparse
+import statistics
+import time
+
+import django_env
+
+
+def fill_catalogue(size):
+    from reviews.models import Category, Genre, Title
+    Category.objects.bulk_create(
+        Category(name=f'Категория {idx}', slug=f'category-{idx}')
+        for idx in range(10)
+    )
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {idx}', slug=f'genre-{idx}') for idx in range(20)
+    )
+    categories = list(Category.objects.values_list('id', flat=True))
+    genres = list(Genre.objects.values_list('id', flat=True))
+    Title.objects.bulk_create(
+        Title(
+            name=f'Произведение {idx}',
+            year=1900 + idx % 120,
+            description=f'Описание произведения {idx}',
+            category_id=categories[idx % len(categories)],
+            rating=None if idx % 7 == 0 else idx % 10 + 1,
+        )
+        for idx in range(size)
+    )
+    Title.genre.through.objects.bulk_create(
+        Title.genre.through(
+            title_id=title_id, genre_id=genres[(title_id + shift) % 20]
+        )
+        for title_id in Title.objects.values_list('id', flat=True)
+        for shift in range(title_id % 3 + 1)
+    )
+
+
+def drf_serializer():
+    from api.serializers import TitlesReadOnlySerializer
+    from reviews.models import Title
+    queryset = Title.objects.select_related('category').prefetch_related(
+        'genre'
+    ).order_by('id')
+    return TitlesReadOnlySerializer(queryset, many=True).data
+
+
+def values_serializer():
+    from api.serializers import TitleValuesSerializer
+    from reviews.models import Title
+    queryset = TitleValuesSerializer.get_queryset(
+        Title.objects.select_related('category').order_by('id')
+    )
+    return TitleValuesSerializer(list(queryset), many=True).data
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--titles', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    django_env.setup()
+    with django_env.test_database():
+        fill_catalogue(args.titles)
+        assert values_serializer() == [
+            dict(item) for item in drf_serializer()
+        ], 'Сериализаторы возвращают разные данные'
+        drf = measure(drf_serializer, args.repeat)
+        values = measure(values_serializer, args.repeat)
+    print(f'Произведений: {args.titles}, повторов: {args.repeat}')
+    print(f'TitlesReadOnlySerializer: {drf * 1000:8.1f} мс')
+    print(f'TitleValuesSerializer:    {values * 1000:8.1f} мс')
+    print(f'Ускорение: {drf / values:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Прямая и отложенная запись комментариев при всплеске POST-запросов.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_write_behind.py [--threads 16] [--requests 100]
+"""
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+import django_env
+
+
+def prepare():
+    from reviews.models import Category, Review, Title, User
+    author = User.objects.create(
+        username='bench', email='bench@ya.ru', role='admin'
+    )
+    title = Title.objects.create(
+        name='Премьера', year=2024,
+        category=Category.objects.create(name='Фильмы', slug='films')
+    )
+    review = Review.objects.create(
+        title=title, author=author, text='Отзыв', score=10
+    )
+    return author, (
+        f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+    )
+
+
+def post_comments(author, url, count, latencies, errors):
+    from django.db import connections
+    from rest_framework.test import APIClient
+    # Исключения не пробрасываются: сигнал got_request_exception общий
+    # для всех потоков, и клиент получил бы чужую ошибку.
+    client = APIClient(raise_request_exception=False)
+    client.force_authenticate(author)
+    try:
+        for idx in range(count):
+            start = time.perf_counter()
+            response = client.post(url, {'text': f'Комментарий {idx}'})
+            latencies.append(time.perf_counter() - start)
+            if response.status_code not in (201, 202):
+                errors.append(response.status_code)
+    finally:
+        connections.close_all()
+
+
+def run(author, url, threads, count, write_behind):
+    from django.conf import settings
+    from api.writebehind import write_buffer
+    from reviews.models import Comment
+    settings.WRITE_BEHIND_ENABLED = write_behind
+    Comment.objects.all().delete()
+    latencies, errors = [], []
+    workers = [
+        threading.Thread(
+            target=post_comments,
+            args=(author, url, count, latencies, errors)
+        )
+        for _ in range(threads)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    accepted = time.perf_counter() - start
+    write_buffer.flush()
+    stored = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'accepted': len(latencies) - len(errors),
+        'errors': len(errors),
+        'stored': Comment.objects.count(),
+        'accept_rate': len(latencies) / accepted,
+        'store_rate': Comment.objects.count() / stored,
+        'p50': statistics.median(latencies) * 1000,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=100)
+    args = parser.parse_args()
+    django_env.setup()
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    logging.getLogger('api.writebehind').setLevel(logging.ERROR)
+    from api.writebehind import write_buffer
+    with tempfile.TemporaryDirectory() as directory:
+        with django_env.test_database(os.path.join(directory, 'bench.db')):
+            author, url = prepare()
+            results = {
+                mode: run(
+                    author, url, args.threads, args.requests,
+                    write_behind=mode == 'write-behind'
+                )
+                for mode in ('direct', 'write-behind')
+            }
+            write_buffer.close()
+    print(f'Потоков: {args.threads}, запросов на поток: {args.requests}')
+    for mode, result in results.items():
+        print(
+            f'{mode:>12}: принято {result["accepted"]}, ошибок '
+            f'{result["errors"]}, записано {result["stored"]}; '
+            f'{result["accept_rate"]:.0f} отв/с, '
+            f'{result["store_rate"]:.0f} записей/с; '
+            f'p50 {result["p50"]:.1f} мс, p99 {result["p99"]:.1f} мс'
+        )
+
+
+if __name__ == '__main__':
+    main()
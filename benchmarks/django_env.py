@@ -0,0 +1,38 @@
+"""Запуск Django для бенчмарков на временной тестовой базе."""
+import os
+import sys
+from contextlib import contextmanager
+
+PROJECT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api_yamdb'
+)
+
+
+def setup():
+    sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database(name=None):
+    """Создаёт тестовую базу с миграциями и удаляет её по выходе.
+
+    По умолчанию база SQLite в памяти; name задаёт файл базы, чтобы
+    несколько потоков писали в неё так же, как в рабочем окружении.
+    """
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment, teardown_test_environment
+    )
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    if name is not None:
+        connection.settings_dict['TEST']['NAME'] = name
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
@@ -0,0 +1,22 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    from django.core.cache import cache
+
+    from api.cache import titles_cache, users_cache
+
+    cache.clear()
+    titles_cache.clear()
+    users_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def throttle_store(settings, tmp_path):
+    """Отдельный файл счётчиков ограничения частоты для каждого теста"""
+    from api.throttling import throttle_store
+
+    settings.THROTTLE_DB_PATH = tmp_path / 'throttle.sqlite3'
+    yield throttle_store
+    throttle_store.close()
@@ -3,7 +3,8 @@ from http import HTTPStatus
 import pytest
 
 from tests.utils import (check_pagination, check_permissions,
-                         create_categories, create_genre, create_titles)
+                         create_categories, create_genre, create_reviews,
+                         create_single_review, create_titles)
 
 
 @pytest.mark.django_db(transaction=True)
@@ -316,3 +317,125 @@ class Test04TitleAPI:
                           HTTPStatus.FORBIDDEN)
         check_permissions(moderator_client, url, data, 'модератора',
                           titles, HTTPStatus.FORBIDDEN)
+
+    def test_06_titles_search(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+
+        response = client.get(url, {'search': 'крепк ореш'})
+        data = response.json()
+        assert [title['id'] for title in data['results']] == [
+            titles[1]['id']
+        ], (
+            f'Проверьте, что эндпоинт `{url}` поддерживает поиск по '
+            'префиксам слов названия через параметр `search`.'
+        )
+
+        admin_client.patch(
+            f'{url}{titles[1]["id"]}/', data={'name': 'Терминатор 2'}
+        )
+        response = client.get(url, {'search': 'термин'})
+        assert response.json()['count'] == 2, (
+            f'Проверьте, что поиск по эндпоинту `{url}` учитывает '
+            'изменённые названия произведений.'
+        )
+
+        admin_client.delete(f'{url}{titles[0]["id"]}/')
+        response = client.get(url, {'search': 'термин'})
+        assert response.json()['count'] == 1, (
+            f'Проверьте, что поиск по эндпоинту `{url}` не находит '
+            'удалённые произведения.'
+        )
+
+    def test_07_titles_score_histogram(self, client, admin_client, admin,
+                                       user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        create_single_review(user_client, titles[1]['id'], 'Так себе', 3)
+        url = f'/api/v1/titles/{titles[0]["id"]}/score-histogram/'
+
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос неавторизованного пользователя к '
+            f'`{url}` возвращает ответ со статусом 200.'
+        )
+        scores = response.json()['scores']
+        expected = {str(score): 0 for score in range(1, 11)}
+        expected['5'] = len(reviews)
+        assert scores == expected, (
+            f'Проверьте, что `{url}` возвращает количество отзывов '
+            'с каждой оценкой от 1 до 10.'
+        )
+
+        user_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/',
+            data={'score': 9}
+        )
+        response = client.get(
+            '/api/v1/titles/score-histogram/',
+            {'ids': f'{titles[0]["id"]},{titles[1]["id"]},999'}
+        )
+        histograms = {item['id']: item['scores'] for item in response.json()}
+        assert set(histograms) == {titles[0]['id'], titles[1]['id']}
+        assert histograms[titles[0]['id']]['5'] == 1
+        assert histograms[titles[0]['id']]['9'] == 1
+        assert histograms[titles[1]['id']]['3'] == 1
+
+        response = client.get('/api/v1/titles/999/score-histogram/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_08_titles_bulk(self, admin_client, user_client, client):
+        titles, categories, genres = create_titles(admin_client)
+        url = '/api/v1/titles/bulk/'
+        data = [
+            {
+                'name': 'Чужой',
+                'year': 1979,
+                'genre': [genres[0]['slug'], genres[2]['slug']],
+                'category': categories[0]['slug'],
+            },
+            {
+                'name': 'Из будущего',
+                'year': 3000,
+                'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'],
+            },
+            {
+                'name': 'Без жанра',
+                'year': 2000,
+                'genre': ['unknown'],
+                'category': categories[0]['slug'],
+            },
+            {'id': titles[1]['id'], 'genre': [genres[1]['slug']]},
+            {'id': titles[1]['id'], 'genre': [genres[1]['slug']]},
+        ]
+        assert user_client.post(
+            url, data=data, format='json'
+        ).status_code == HTTPStatus.FORBIDDEN
+
+        response = admin_client.post(url, data=data, format='json')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что POST-запрос администратора к `{url}` '
+            'возвращает ответ со статусом 200.'
+        )
+        results = response.json()
+        assert results[0]['status'] == 'created'
+        assert 'year' in results[1]['errors'], (
+            f'Проверьте, что `{url}` возвращает ошибки валидации для '
+            'каждого некорректного элемента.'
+        )
+        assert 'genre' in results[2]['errors']
+        assert results[3] == {'id': titles[1]['id'], 'status': 'updated'}
+        assert 'id' in results[4]['errors'], (
+            f'Проверьте, что `{url}` возвращает ошибку для повторного `id` '
+            'в пакете, а не прерывает сохранение.'
+        )
+
+        created = client.get(f'/api/v1/titles/{results[0]["id"]}/').json()
+        assert created['genre'] == [genres[2], genres[0]]
+        assert created['category'] == categories[0]
+        updated = client.get(f'/api/v1/titles/{titles[1]["id"]}/').json()
+        assert updated['genre'] == [genres[1]]
+        assert updated['name'] == titles[1]['name']
+        assert client.get('/api/v1/titles/').json()['count'] == 3
@@ -1,8 +1,12 @@
 from http import HTTPStatus
 
 import pytest
+from django.core.management import call_command
 from django.db.utils import IntegrityError
 
+from api.serializers import ReviewSerializer
+from reviews.models import Review, Title
+
 from tests.utils import (check_fields, check_pagination, create_reviews,
                          create_single_review, create_titles)
 
@@ -384,3 +388,176 @@ class Test05ReviewAPI:
                 f'Проверьте, что DELETE-запрос {role} к чужому отзыву через '
                 f'`{url_template}` удаляет отзыв.'
             )
+
+    def test_06_review_duplicate(self, admin_client, admin, user_client,
+                                 user):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = admin_client.post(url, data={'text': 'Ещё', 'score': 3})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что повторный отзыв на произведение через '
+            f'`{url}` возвращает ответ со статусом 400.'
+        )
+        assert 'non_field_errors' in response.json(), (
+            'Проверьте, что ошибка повторного отзыва возвращается '
+            'в ключе `non_field_errors`.'
+        )
+        response = user_client.post(url, data={'text': 'Мой', 'score': 3})
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что отзыв другого пользователя на то же '
+            'произведение создаётся.'
+        )
+        response = admin_client.post(
+            '/api/v1/titles/0/reviews/', data={'text': 'Ещё', 'score': 3}
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что POST-запрос к отзывам несуществующего '
+            'произведения возвращает ответ со статусом 404.'
+        )
+        title = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/').json()
+        assert title['rating'] == 4, (
+            'Проверьте, что отклонённый повторный отзыв не меняет рейтинг '
+            'произведения.'
+        )
+        serializer = ReviewSerializer(data={'text': 'Ещё', 'score': 3})
+        assert serializer.is_valid()
+        with pytest.raises(IntegrityError):
+            # Произведение удалено между проверкой и вставкой отзыва.
+            serializer.save(author=user, title_id=titles[0]['id'] + 100)
+
+    def test_07_reviews_bulk(self, admin_client, admin, user_client, user,
+                             moderator):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = '/api/v1/reviews/bulk/'
+        data = [
+            {
+                'title_id': titles[0]['id'], 'author': user.username,
+                'text': 'Хорошо', 'score': 9,
+                'pub_date': '2020-01-02T03:04:05Z',
+            },
+            {
+                'title_id': titles[0]['id'], 'author': user.username,
+                'text': 'Ещё раз', 'score': 1,
+            },
+            {
+                'title_id': titles[0]['id'], 'author': admin.username,
+                'text': 'Повтор', 'score': 1,
+            },
+            {
+                'title_id': titles[1]['id'], 'author': 'nobody',
+                'text': 'Кто я', 'score': 5,
+            },
+            {
+                'title_id': titles[1]['id'], 'author': moderator.username,
+                'text': 'Плохо', 'score': 11,
+            },
+            {
+                'title_id': titles[1]['id'], 'author': moderator.username,
+                'text': 'Неплохо', 'score': 6,
+            },
+        ]
+        response = user_client.post(url, data=data, format='json')
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что POST-запрос пользователя к `{url}` возвращает '
+            'ответ со статусом 403.'
+        )
+        response = admin_client.post(url, data=data, format='json')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что POST-запрос администратора к `{url}` '
+            'возвращает ответ со статусом 200.'
+        )
+        results = response.json()
+        assert [result.get('status') for result in results] == [
+            'created', None, None, None, None, 'created'
+        ], (
+            f'Проверьте, что `{url}` возвращает результат для каждого '
+            'элемента в порядке запроса.'
+        )
+        for index, field in (
+            (1, 'non_field_errors'), (2, 'non_field_errors'),
+            (3, 'author'), (4, 'score'),
+        ):
+            assert field in results[index]['errors'], (
+                f'Проверьте, что `{url}` возвращает ошибку `{field}` '
+                'для некорректного элемента.'
+            )
+        review = admin_client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{results[0]["id"]}/'
+        ).json()
+        assert review['author'] == user.username
+        assert review['pub_date'] == '2020-01-02T03:04:05Z', (
+            f'Проверьте, что `{url}` сохраняет переданную дату публикации.'
+        )
+        for title, rating in ((titles[0], 7), (titles[1], 6)):
+            response = admin_client.get(f'/api/v1/titles/{title["id"]}/')
+            assert response.json()['rating'] == rating, (
+                f'Проверьте, что после `{url}` пересчитывается рейтинг '
+                'произведений.'
+            )
+        response = admin_client.post(url, data={'text': 1}, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    @staticmethod
+    def assert_aggregates(title_id, expected, action):
+        aggregates = Title.objects.filter(pk=title_id).values(
+            'rating', 'score_sum', 'review_count'
+        ).get()
+        assert aggregates == expected, (
+            f'Проверьте, что после {action} рейтинг, сумма оценок и число '
+            f'отзывов произведения равны {expected}, а не {aggregates}.'
+        )
+
+    def test_08_review_aggregates(self, admin_client, admin, user_client,
+                                  user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id = titles[0]['id']
+        self.assert_aggregates(
+            title_id,
+            {'rating': 5, 'score_sum': 10, 'review_count': 2},
+            'создания отзывов'
+        )
+        url = f'/api/v1/titles/{title_id}/reviews/{reviews[1]["id"]}/'
+        response = user_client.patch(url, data={'score': 8})
+        assert response.status_code == HTTPStatus.OK
+        self.assert_aggregates(
+            title_id,
+            {'rating': 6.5, 'score_sum': 13, 'review_count': 2},
+            'изменения оценки'
+        )
+        response = user_client.delete(url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        self.assert_aggregates(
+            title_id,
+            {'rating': 5, 'score_sum': 5, 'review_count': 1},
+            'удаления отзыва'
+        )
+        Title.objects.update(rating=1, score_sum=100, review_count=7)
+        call_command('rebuild_aggregates')
+        self.assert_aggregates(
+            title_id,
+            {'rating': 5, 'score_sum': 5, 'review_count': 1},
+            '`rebuild_aggregates`'
+        )
+        self.assert_aggregates(
+            titles[1]['id'],
+            {'rating': None, 'score_sum': 0, 'review_count': 0},
+            '`rebuild_aggregates`'
+        )
+
+    def test_09_stale_title_save(self, admin_client, admin, user):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        title_id = titles[0]['id']
+        stale = Title.objects.get(pk=title_id)
+        Review.objects.create(
+            title_id=title_id, author=user, text='Отзыв', score=9
+        )
+        stale.name = 'Новое название'
+        stale.save()
+        self.assert_aggregates(
+            title_id,
+            {'rating': 7, 'score_sum': 14, 'review_count': 2},
+            'сохранения произведения, загруженного до нового отзыва'
+        )
+        assert Title.objects.get(pk=title_id).name == 'Новое название'
@@ -2,6 +2,7 @@ from http import HTTPStatus
 
 import pytest
 
+from reviews.models import Comment, Review
 from tests.utils import (check_fields, check_pagination, create_comments,
                          create_reviews, create_single_comment)
 
@@ -381,3 +382,76 @@ class Test06CommentAPI:
             'Проверьте, что DELETE-запрос неавторизованного пользователя к '
             f'`{url}` возвращает ответ со статусом 401.'
         )
+
+    def test_07_comment_review_of_other_title(self, admin_client, admin,
+                                              user_client, user):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = (
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[0]["id"]}'
+            '/comments/'
+        )
+        for response, action in (
+            (admin_client.get(url), 'GET-запрос к'),
+            (admin_client.get(f'{url}{comments[0]["id"]}/'),
+             'GET-запрос к комментарию через'),
+            (admin_client.post(url, data={'text': 'Текст'}),
+             'POST-запрос к'),
+            (admin_client.delete(f'{url}{comments[0]["id"]}/'),
+             'DELETE-запрос к комментарию через'),
+        ):
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что {action} `/api/v1/titles/{{title_id}}/'
+                'reviews/{review_id}/comments/` с отзывом, относящимся к '
+                'другому произведению, возвращает ответ со статусом 404.'
+            )
+        response = admin_client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}'
+            '/comments/'
+        )
+        assert response.json()['count'] == len(comments), (
+            'Проверьте, что запросы с неверным произведением не меняют '
+            'комментарии отзыва.'
+        )
+
+    def test_08_review_comment_count(self, admin_client, admin, user_client,
+                                     user):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        url = f'{reviews_url}{reviews[0]["id"]}/'
+        response = admin_client.get(url)
+        assert response.json().get('comment_count') == len(comments), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'количество комментариев к отзыву в поле `comment_count`.'
+        )
+        admin_client.delete(f'{url}comments/{comments[0]["id"]}/')
+        response = admin_client.get(reviews_url)
+        counts = {
+            review['id']: review['comment_count']
+            for review in response.json()['results']
+        }
+        assert counts == {
+            reviews[0]['id']: len(comments) - 1, reviews[1]['id']: 0
+        }, (
+            'Проверьте, что удаление комментария уменьшает `comment_count` '
+            'отзыва в списке отзывов.'
+        )
+        response = admin_client.patch(url, data={'comment_count': 100})
+        assert response.json()['comment_count'] == len(comments) - 1, (
+            'Проверьте, что поле `comment_count` доступно только для чтения.'
+        )
+
+    def test_09_stale_review_save(self, admin_client, admin, user):
+        reviews, _ = create_reviews(admin_client, {admin: admin_client})
+        stale = Review.objects.get(pk=reviews[0]['id'])
+        Comment.objects.create(review=stale, author=user, text='Комментарий')
+        stale.text = 'Новый текст'
+        stale.save()
+        review = Review.objects.get(pk=stale.pk)
+        assert (review.text, review.comment_count) == ('Новый текст', 1), (
+            'Проверьте, что сохранение отзыва, загруженного до нового '
+            'комментария, не затирает `comment_count`.'
+        )
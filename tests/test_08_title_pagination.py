@@ -0,0 +1,71 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleCursorPagination:
+    url = '/api/v1/titles/'
+
+    @staticmethod
+    def create_rated_titles(authors):
+        scores = (None, 7, 3, None, 7, 10, None, 3, 7)
+        for idx, score in enumerate(scores):
+            title = Title.objects.create(name=f'Title {idx % 4}', year=2000)
+            if score is not None:
+                for author in authors:
+                    Review.objects.create(
+                        title=title, author=author, text='text', score=score
+                    )
+        return [
+            title.id for title in sorted(
+                Title.objects.all(),
+                key=lambda title: (
+                    title.rating is None, -(title.rating or 0),
+                    title.name, title.id
+                )
+            )
+        ]
+
+    def test_01_cursor_walks_forward_and_back(self, client, user, admin):
+        expected = self.create_rated_titles([user, admin])
+
+        pages = []
+        response = client.get(self.url, {'cursor': '', 'limit': 2})
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что в режиме курсора не выполняется подсчёт '
+            'всех произведений.'
+        )
+        assert data['previous'] is None
+        pages.append([title['id'] for title in data['results']])
+        while data['next']:
+            data = client.get(data['next']).json()
+            pages.append([title['id'] for title in data['results']])
+        assert sum(pages, []) == expected, (
+            f'Проверьте, что курсорная пагинация `{self.url}` обходит все '
+            'произведения в порядке (-rating, name, id) без пропусков и '
+            'повторов.'
+        )
+
+        backward = [[title['id'] for title in data['results']]]
+        while data['previous']:
+            data = client.get(data['previous']).json()
+            backward.insert(0, [title['id'] for title in data['results']])
+        assert backward == pages, (
+            f'Проверьте, что ссылка `previous` курсорной пагинации '
+            f'`{self.url}` возвращает предыдущие страницы.'
+        )
+
+    def test_02_limit_offset_is_default(self, client, user):
+        self.create_rated_titles([user])
+        data = client.get(self.url, {'limit': 2, 'offset': 4}).json()
+        assert data['count'] == Title.objects.count()
+        assert len(data['results']) == 2
+
+    def test_03_invalid_cursor(self, client):
+        response = client.get(self.url, {'cursor': 'broken'})
+        assert response.status_code == HTTPStatus.NOT_FOUND
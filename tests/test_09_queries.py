@@ -0,0 +1,198 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.authentication import get_access_token
+from api.serializers import TitlesReadOnlySerializer, TitleValuesSerializer
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+def create_catalogue(size):
+    category = Category.objects.create(name='Фильмы', slug='films')
+    genres = [
+        Genre.objects.create(name=f'Жанр {idx}', slug=f'genre-{idx}')
+        for idx in range(3)
+    ]
+    for idx in range(size):
+        title = Title.objects.create(
+            name=f'Произведение {idx}', year=2000, category=category
+        )
+        title.genre.set(genres[:idx % 3 + 1])
+    return Title.objects.first()
+
+
+def create_discussion(size):
+    title = create_catalogue(1)
+    authors = [
+        User.objects.create(username=f'author{idx}', email=f'a{idx}@ya.ru')
+        for idx in range(size)
+    ]
+    reviews = [
+        Review.objects.create(title=title, author=author, text='Отзыв')
+        for author in authors
+    ]
+    for author in authors:
+        Comment.objects.create(
+            review=reviews[0], author=author, text='Комментарий'
+        )
+    return title, reviews[0]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09Queries:
+
+    @pytest.mark.parametrize('size', (1, 30))
+    def test_01_title_list_queries(self, client, size,
+                                   django_assert_num_queries):
+        create_catalogue(size)
+        with django_assert_num_queries(4):
+            response = client.get('/api/v1/titles/', {'limit': size})
+        assert len(response.json()['results']) == size, (
+            'Проверьте, что список произведений загружает категории и жанры '
+            'фиксированным числом запросов.'
+        )
+
+    def test_02_title_detail_queries(self, client,
+                                     django_assert_num_queries):
+        title = create_catalogue(3)
+        with django_assert_num_queries(4):
+            response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response.json()['genre'], (
+            'Проверьте, что произведение загружает категорию и жанры '
+            'фиксированным числом запросов.'
+        )
+
+    def test_03_title_values_serializer(self, client):
+        create_catalogue(4)
+        Title.objects.create(name='Без категории', year=1990)
+        Title.objects.filter(name='Произведение 1').update(rating=7.6)
+        queryset = Title.objects.order_by('id')
+        expected = TitlesReadOnlySerializer(queryset, many=True).data
+        data = TitleValuesSerializer(
+            TitleValuesSerializer.get_queryset(queryset), many=True
+        ).data
+        assert data == [dict(item) for item in expected], (
+            'Проверьте, что быстрый сериализатор произведений возвращает '
+            'те же данные, что и TitlesReadOnlySerializer.'
+        )
+        response = client.get(f'/api/v1/titles/{expected[-1]["id"]}/')
+        assert response.json() == expected[-1], (
+            'Проверьте, что произведение без категории и жанров '
+            'отдаётся с `category: null` и пустым списком жанров.'
+        )
+
+    @pytest.mark.parametrize('size', (1, 30))
+    def test_04_review_list_queries(self, client, size,
+                                    django_assert_num_queries):
+        title, _ = create_discussion(size)
+        with django_assert_num_queries(3):
+            response = client.get(
+                f'/api/v1/titles/{title.id}/reviews/', {'limit': size}
+            )
+        results = response.json()['results']
+        assert len(results) == size and all(
+            item['author'].startswith('author') for item in results
+        ), (
+            'Проверьте, что список отзывов загружает авторов '
+            'фиксированным числом запросов.'
+        )
+
+    @pytest.mark.parametrize('size', (1, 30))
+    def test_05_comment_list_queries(self, client, size,
+                                     django_assert_num_queries):
+        title, review = create_discussion(size)
+        with django_assert_num_queries(4):
+            response = client.get(
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+                {'limit': size}
+            )
+        results = response.json()['results']
+        assert len(results) == size and all(
+            item['author'].startswith('author') for item in results
+        ), (
+            'Проверьте, что список комментариев загружает авторов '
+            'фиксированным числом запросов.'
+        )
+
+    def test_06_missing_parent(self, client):
+        title, review = create_discussion(1)
+        for url in (
+            f'/api/v1/titles/{title.id + 1}/reviews/',
+            f'/api/v1/titles/{title.id}/reviews/{review.id + 1}/comments/',
+        ):
+            response = client.get(url)
+            assert response.status_code == 404, (
+                f'Проверьте, что GET-запрос к `{url}` для '
+                'несуществующего родителя возвращает ответ со статусом 404.'
+            )
+
+    def test_07_signup_queries(self, client):
+        User.objects.create(username='taken', email='taken@ya.ru')
+        User.objects.create(username='other', email='other@ya.ru')
+        url = '/api/v1/auth/signup/'
+        cases = (
+            ({'username': 'new', 'email': 'new@ya.ru'}, 200, {}, 1),
+            ({'username': 'taken', 'email': 'taken@ya.ru'}, 200, {}, 2),
+            (
+                {'username': 'taken', 'email': 'fresh@ya.ru'}, 400,
+                {'username'}, 2
+            ),
+            (
+                {'username': 'fresh', 'email': 'taken@ya.ru'}, 400,
+                {'email'}, 2
+            ),
+            (
+                {'username': 'taken', 'email': 'other@ya.ru'}, 400,
+                {'username', 'email'}, 2
+            ),
+        )
+        for data, expected_status, errors, expected_queries in cases:
+            with CaptureQueriesContext(connection) as context:
+                response = client.post(url, data=data)
+            assert response.status_code == expected_status
+            if errors:
+                assert set(response.json()) == errors, (
+                    f'Проверьте, что при регистрации {data} ошибка '
+                    'указывает на все занятые поля.'
+                )
+            user_queries = [
+                query['sql'] for query in context.captured_queries
+                if 'reviews_user' in query['sql']
+            ]
+            assert len(user_queries) == expected_queries, (
+                f'Проверьте, что регистрация {data} делает не больше одной '
+                'вставки и одного поиска пользователя: '
+                f'{user_queries}'
+            )
+
+    def test_08_create_without_author_query(self):
+        create_catalogue(2)
+        first, second = Title.objects.order_by('id')
+        author = User.objects.create(username='author', email='a@ya.ru')
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {get_access_token(author)}'
+        )
+        url = '/api/v1/titles/{}/reviews/'
+        data = {'text': 'Отзыв', 'score': 5}
+        # Первый запрос кеширует версию прав пользователя.
+        assert client.post(url.format(first.id), data=data).status_code == 201
+        with CaptureQueriesContext(connection) as context:
+            review = client.post(url.format(second.id), data=data)
+            comment = client.post(
+                f'{url.format(second.id)}{review.json()["id"]}/comments/',
+                data={'text': 'Комментарий'}
+            )
+        assert (review.status_code, comment.status_code) == (201, 201)
+        assert review.json()['author'] == comment.json()['author'] == (
+            'author'
+        )
+        user_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'reviews_user' in query['sql']
+        ]
+        assert not user_queries, (
+            'Проверьте, что создание отзыва и комментария пользователем '
+            f'из токена не загружает автора из базы: {user_queries}'
+        )
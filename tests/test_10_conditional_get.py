@@ -0,0 +1,124 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Title
+from tests.utils import create_reviews, create_single_comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10ConditionalGet:
+
+    @staticmethod
+    def assert_not_modified(client, url, response):
+        for header, condition in (
+            ('ETag', 'HTTP_IF_NONE_MATCH'),
+            ('Last-Modified', 'HTTP_IF_MODIFIED_SINCE'),
+        ):
+            if not response.has_header(header):
+                continue
+            repeated = client.get(url, **{condition: response[header]})
+            assert repeated.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что GET-запрос к `{url}` с заголовком '
+                f'по значению `{header}` возвращает ответ со статусом 304, '
+                'если ресурс не изменился.'
+            )
+
+    def test_01_reviews_and_comments(self, client, admin_client, admin,
+                                     user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client}
+        )
+        title_id = titles[0]['id']
+        urls = (
+            f'/api/v1/titles/{title_id}/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/{reviews[0]["id"]}/',
+            f'/api/v1/titles/{title_id}/reviews/{reviews[0]["id"]}/'
+            'comments/',
+        )
+        etags = {}
+        for url in urls:
+            response = client.get(url)
+            assert response.has_header('ETag'), (
+                f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+                'заголовок `ETag`.'
+            )
+            assert response.has_header('Last-Modified')
+            self.assert_not_modified(client, url, response)
+            etags[url] = response['ETag']
+
+        create_single_comment(
+            user_client, title_id, reviews[0]['id'], 'comment'
+        )
+        for url in urls:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что после изменения данных GET-запрос к `{url}` '
+                'с устаревшим `ETag` возвращает ответ со статусом 200.'
+            )
+
+    def test_02_title_list(self, client, admin_client):
+        url = '/api/v1/titles/'
+        response = client.get(url)
+        self.assert_not_modified(client, url, response)
+
+        create_reviews(admin_client, {})
+        response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['count'] == 2
+
+    def test_03_missing_title(self, client):
+        response = client.get('/api/v1/titles/999/reviews/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_04_version_shared_between_processes(self, client,
+                                                 admin_client):
+        create_reviews(admin_client, {})
+        url = '/api/v1/titles/'
+        first = client.get(url)
+        assert client.get(url)['X-Cache'] == 'HIT'
+        # Команда из другого процесса меняет рейтинг без сигналов.
+        Title.objects.update(rating=None, score_sum=0, review_count=0)
+        call_command('rebuild_aggregates')
+        response = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что `rebuild_aggregates` делает устаревшим `ETag` '
+            'списка произведений во всех процессах.'
+        )
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что версия каталога хранится в базе, а не в кеше '
+            'процесса.'
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    def test_05_author_renamed(self, client, admin_client, admin,
+                               user_client, user):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        create_single_comment(
+            user_client, titles[0]['id'], reviews[0]['id'], 'comment'
+        )
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+            'comments/'
+        )
+        other_url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+        other_etag = client.get(other_url)['ETag']
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'username': 'renamed'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после переименования автора GET-запрос к '
+            f'`{url}` с устаревшим `ETag` возвращает ответ со статусом 200.'
+        )
+        assert response.json()['results'][0]['author'] == 'renamed'
+        response = client.get(other_url, HTTP_IF_NONE_MATCH=other_etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что переименование автора не меняет `ETag` '
+            'произведений без его отзывов и комментариев.'
+        )
@@ -0,0 +1,101 @@
+import pytest
+from django.db import connection
+
+from reviews.models import Comment, Review, Title, TitleGenre
+
+
+def explain(queryset, phase):
+    """План запроса SQLite. Комментарий с фазой не даёт модулю sqlite3
+    вернуть закешированный до изменения схемы план."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql} -- {phase}', params)
+        return ' | '.join(row[-1] for row in cursor.fetchall())
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='План запроса в формате SQLite'
+)
+@pytest.mark.django_db
+class Test11Indexes:
+
+    @pytest.mark.parametrize('queryset, index, sorted_by_index', (
+        (
+            lambda: Review.objects.filter(title_id=1)[:10],
+            'review_title_pub_date_idx', True
+        ),
+        (
+            lambda: Comment.objects.filter(review_id=1)[:10],
+            'comment_review_pub_date_idx', True
+        ),
+        (
+            lambda: Review.objects.filter(
+                author_id=1, pub_date__isnull=False
+            ).order_by('-pub_date', '-id')[:10],
+            'review_author_pub_date_idx', True
+        ),
+        (
+            lambda: Comment.objects.filter(
+                author_id=1, pub_date__isnull=False
+            ).order_by('-pub_date', '-id')[:10],
+            'comment_author_pub_date_idx', True
+        ),
+        (
+            lambda: Review.objects.filter(
+                pub_date__isnull=False
+            ).order_by('-pub_date', '-id')[:10],
+            'review_pub_date_idx', True
+        ),
+        (
+            lambda: Comment.objects.filter(
+                pub_date__isnull=False
+            ).order_by('-pub_date', '-id')[:10],
+            'comment_pub_date_idx', True
+        ),
+        (
+            lambda: Title.objects.filter(year=2000)[:10],
+            'title_year_idx', False
+        ),
+        (
+            lambda: Title.objects.filter(genre__slug='drama')[:10],
+            'title_genre_genre_title_idx', False
+        ),
+        (
+            lambda: Title.objects.trending()[:10],
+            'title_trending_idx', True
+        ),
+    ))
+    def test_01_query_plan(self, queryset, index, sorted_by_index):
+        after = explain(queryset(), 'after')
+        assert index in after, (
+            f'Проверьте, что запрос использует индекс `{index}`: {after}'
+        )
+        if sorted_by_index:
+            assert 'TEMP B-TREE' not in after, (
+                f'Проверьте, что индекс `{index}` задаёт порядок выдачи '
+                f'без отдельной сортировки: {after}'
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP INDEX "{index}"')
+        before = explain(queryset(), 'before')
+        assert index not in before
+        if sorted_by_index:
+            assert 'TEMP B-TREE' in before, (
+                f'Без индекса `{index}` ожидалась сортировка во временном '
+                f'B-дереве: {before}'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_index_survives_table_remake(self):
+        with connection.schema_editor() as editor:
+            editor._remake_table(TitleGenre)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' "
+                'AND tbl_name = %s', [TitleGenre._meta.db_table]
+            )
+            indexes = {row[0] for row in cursor.fetchall()}
+        assert 'title_genre_genre_title_idx' in indexes, (
+            'Проверьте, что индекс связи жанров с произведениями описан в '
+            f'модели и не теряется при пересоздании таблицы: {indexes}'
+        )
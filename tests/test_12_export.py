@@ -0,0 +1,97 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments
+
+
+def read_ndjson(response):
+    content = b''.join(response.streaming_content).decode()
+    return [json.loads(line) for line in content.splitlines()]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12Export:
+
+    @pytest.mark.parametrize('url', (
+        '/api/v1/reviews/export/', '/api/v1/comments/export/'
+    ))
+    def test_01_export_permissions(self, client, user_client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            f'Проверьте, что GET-запрос неавторизованного пользователя к '
+            f'`{url}` возвращает ответ со статусом 401.'
+        )
+        response = user_client.get(url)
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что GET-запрос пользователя к `{url}` '
+            'возвращает ответ со статусом 403.'
+        )
+
+    def test_02_export_reviews(self, admin_client, admin, user_client,
+                               user, settings):
+        settings.EXPORT_CHUNK_SIZE = 1
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = '/api/v1/reviews/export/'
+        response = admin_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'] == 'application/x-ndjson', (
+            f'Проверьте, что `{url}` отдаёт `application/x-ndjson`.'
+        )
+        rows = read_ndjson(response)
+        assert [row['id'] for row in rows] == sorted(
+            review['id'] for review in reviews
+        ), (
+            f'Проверьте, что `{url}` выгружает все отзывы по одному в '
+            'строке в порядке id.'
+        )
+        assert rows[0]['author'] == reviews[0]['author']
+        assert rows[0]['title'] == titles[0]['id']
+        assert rows[0]['comment_count'] == len(comments)
+        api_review = admin_client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{rows[0]["id"]}/'
+        ).json()
+        assert rows[0]['pub_date'] == api_review['pub_date'], (
+            'Проверьте, что дата в выгрузке в том же формате, что и в API.'
+        )
+        response = admin_client.get(url, {'title': titles[1]['id']})
+        assert read_ndjson(response) == [], (
+            f'Проверьте, что `{url}` фильтрует отзывы по параметру `title`.'
+        )
+        response = admin_client.get(url, {'since': rows[-1]['pub_date']})
+        assert [row['id'] for row in read_ndjson(response)] == [
+            rows[-1]['id']
+        ], (
+            f'Проверьте, что `{url}` фильтрует отзывы по параметру `since`.'
+        )
+        response = admin_client.get(url, {'until': rows[-1]['pub_date']})
+        assert len(read_ndjson(response)) == len(rows) - 1, (
+            f'Проверьте, что `{url}` фильтрует отзывы по параметру `until`.'
+        )
+        response = admin_client.get(url, {'since': 'вчера'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что `{url}` с некорректной датой возвращает ответ '
+            'со статусом 400.'
+        )
+
+    def test_03_export_comments(self, admin_client, admin, user_client,
+                                user):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = '/api/v1/comments/export/'
+        rows = read_ndjson(admin_client.get(url, {'title': titles[0]['id']}))
+        assert [(row['id'], row['text'], row['review']) for row in rows] == [
+            (comment['id'], comment['text'], reviews[0]['id'])
+            for comment in comments
+        ], (
+            f'Проверьте, что `{url}` выгружает комментарии произведения.'
+        )
+        response = admin_client.get(url, {'review': reviews[1]['id']})
+        assert read_ndjson(response) == [], (
+            f'Проверьте, что `{url}` фильтрует комментарии по параметру '
+            '`review`.'
+        )
@@ -0,0 +1,110 @@
+from http import HTTPStatus
+
+import pytest
+
+from api.writebehind import WriteBehindBuffer
+from reviews.models import Comment, Review
+from tests.utils import create_reviews
+
+
+@pytest.fixture
+def write_behind(monkeypatch):
+    """Буфер, поток которого запускается только в drain(), чтобы запись
+    не пересекалась с запросами теста."""
+    buffer = WriteBehindBuffer(max_size=100, batch_size=2)
+    monkeypatch.setattr(buffer, 'start', lambda: None)
+    monkeypatch.setattr('api.views.write_buffer', buffer)
+    return buffer
+
+
+def drain(buffer):
+    WriteBehindBuffer.start(buffer)
+    buffer.close()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13WriteBehind:
+
+    def test_01_comment_write_behind(self, write_behind, settings,
+                                     admin_client, admin):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        settings.WRITE_BEHIND_ENABLED = True
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}'
+            '/comments/'
+        )
+        for idx in range(3):
+            response = admin_client.post(url, data={'text': f'Текст {idx}'})
+            assert response.status_code == HTTPStatus.ACCEPTED, (
+                f'Проверьте, что при отложенной записи POST-запрос к `{url}` '
+                'возвращает ответ со статусом 202.'
+            )
+        assert response.json() == {'text': 'Текст 2'}
+        response = admin_client.post(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[0]["id"]}'
+            '/comments/', data={'text': 'Текст'}
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что при отложенной записи комментарий к отзыву '
+            'другого произведения отклоняется со статусом 404.'
+        )
+        assert not Comment.objects.exists()
+        drain(write_behind)
+        assert Comment.objects.filter(author=admin).count() == 3, (
+            'Проверьте, что фоновый поток записывает принятые комментарии.'
+        )
+        review = admin_client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        ).json()
+        assert review['comment_count'] == 3
+
+    def test_02_review_write_behind(self, write_behind, settings,
+                                    admin_client, admin, user_client, user,
+                                    moderator_client, monkeypatch):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        settings.WRITE_BEHIND_ENABLED = True
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = admin_client.post(url, data={'text': 'Ещё', 'score': 1})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что при отложенной записи повторный отзыв '
+            'отклоняется до постановки в очередь.'
+        )
+        for score in (3, 4):
+            response = user_client.post(
+                url, data={'text': 'Мой', 'score': score}
+            )
+            assert response.status_code == HTTPStatus.ACCEPTED
+        drain(write_behind)
+        assert Review.objects.filter(author=user).count() == 1, (
+            'Проверьте, что фоновый поток записывает принятые отзывы, '
+            'а повтор ещё не записанного отзыва отклоняет ограничение.'
+        )
+        assert (write_behind.written, write_behind.failed) == (1, 1)
+        title = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/').json()
+        assert title['rating'] == 4
+
+        monkeypatch.setattr(write_behind, 'put', lambda *args: False)
+        response = moderator_client.post(url, data={'text': 'A', 'score': 3})
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что при заполненной очереди отзыв сохраняется сразу '
+            'и возвращается ответ со статусом 201.'
+        )
+        assert Review.objects.filter(pk=response.json()['id']).exists()
+
+    def test_03_close_flushes_queue(self, admin_client, admin):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        buffer = WriteBehindBuffer(max_size=10, batch_size=3)
+        for idx in range(5):
+            assert buffer.put(Comment, {
+                'review_id': reviews[0]['id'],
+                'author_id': admin.pk,
+                'text': f'Текст {idx}',
+            })
+        buffer.put(Comment, {'review_id': 0, 'author_id': admin.pk})
+        buffer.close()
+        assert Comment.objects.count() == 5, (
+            'Проверьте, что close() дописывает всю очередь, а ошибка одной '
+            'записи не отменяет остальные.'
+        )
+        assert (buffer.written, buffer.failed) == (5, 1)
+        assert not buffer.thread.is_alive()
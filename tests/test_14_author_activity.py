@@ -0,0 +1,84 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14AuthorActivity:
+
+    @pytest.mark.parametrize('resource', ('reviews', 'comments'))
+    def test_01_author_activity_permissions(self, client, user_client, user,
+                                            moderator_client, resource):
+        url = f'/api/v1/users/{user.username}/{resource}/'
+        assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED, (
+            f'Проверьте, что GET-запрос неавторизованного пользователя к '
+            f'`{url}` возвращает ответ со статусом 401.'
+        )
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что GET-запрос пользователя к `{url}` '
+            'возвращает ответ со статусом 403.'
+        )
+        response = moderator_client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос модератора к `{url}` '
+            'возвращает ответ со статусом 200.'
+        )
+        url = f'/api/v1/users/nobody/{resource}/'
+        assert moderator_client.get(url).status_code == (
+            HTTPStatus.NOT_FOUND
+        ), (
+            f'Проверьте, что GET-запрос к `{url}` для несуществующего '
+            'пользователя возвращает ответ со статусом 404.'
+        )
+
+    def test_02_author_reviews(self, admin_client, admin, user_client, user):
+        reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )[1:]
+        for title in titles[1:]:
+            admin_client.post(
+                f'/api/v1/titles/{title["id"]}/reviews/',
+                data={'text': f'Отзыв на {title["name"]}', 'score': 7}
+            )
+        url = f'/api/v1/users/{admin.username}/reviews/'
+        response = admin_client.get(url, {'limit': 1})
+        data = response.json()
+        assert set(data) == {'next', 'previous', 'results'}, (
+            f'Проверьте, что `{url}` использует курсорную пагинацию.'
+        )
+        pages = [data['results']]
+        while data['next']:
+            data = admin_client.get(data['next']).json()
+            pages.append(data['results'])
+        items = [item for page in pages for item in page]
+        assert [len(page) for page in pages] == [1] * len(titles), (
+            f'Проверьте, что `{url}` листает все отзывы автора страницами '
+            'по `limit`.'
+        )
+        assert [item['title'] for item in items] == [
+            title['id'] for title in reversed(titles)
+        ], (
+            f'Проверьте, что `{url}` отдаёт отзывы автора от новых к старым '
+            'с id произведения.'
+        )
+        assert {item['author'] for item in items} == {admin.username}
+        previous = admin_client.get(data['previous']).json()
+        assert previous['results'] == pages[-2], (
+            'Проверьте, что ссылка `previous` возвращает предыдущую страницу.'
+        )
+
+    def test_03_author_comments(self, admin_client, admin, user_client,
+                                user):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/users/{user.username}/comments/'
+        results = admin_client.get(url).json()['results']
+        assert [
+            (item['id'], item['review'], item['title']) for item in results
+        ] == [(comments[1]['id'], reviews[0]['id'], titles[0]['id'])], (
+            f'Проверьте, что `{url}` отдаёт комментарии автора с id отзыва '
+            'и произведения.'
+        )
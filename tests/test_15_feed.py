@@ -0,0 +1,99 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments
+
+
+def create_activity(admin_client, admin, user_client, user):
+    """Отзывы и комментарии в порядке создания: (тип, id)"""
+    comments, reviews, titles = create_comments(
+        admin_client, {admin: admin_client, user: user_client}
+    )
+    activity = [('review', review['id']) for review in reviews]
+    activity += [('comment', comment['id']) for comment in comments]
+    response = admin_client.post(
+        f'/api/v1/titles/{titles[1]["id"]}/reviews/',
+        data={'text': 'Ещё отзыв', 'score': 8}
+    )
+    activity.append(('review', response.json()['id']))
+    response = user_client.post(
+        f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}'
+        '/comments/', data={'text': 'Ещё комментарий'}
+    )
+    activity.append(('comment', response.json()['id']))
+    return activity, reviews, titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15Feed:
+
+    def test_01_feed_pages(self, client, admin_client, admin, user_client,
+                           user):
+        activity, reviews, titles = create_activity(
+            admin_client, admin, user_client, user
+        )
+        url = '/api/v1/feed/'
+        response = client.get(url, {'limit': 3})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` доступен без токена.'
+        )
+        data = response.json()
+        pages = [data['results']]
+        while data['next']:
+            data = client.get(data['next']).json()
+            pages.append(data['results'])
+        assert [len(page) for page in pages] == [3, 3], (
+            f'Проверьте, что `{url}` отдаёт ленту страницами по `limit`.'
+        )
+        items = [item for page in pages for item in page]
+        assert [(item['type'], item['id']) for item in items] == (
+            activity[::-1]
+        ), (
+            f'Проверьте, что `{url}` перемежает отзывы и комментарии от '
+            'новых к старым.'
+        )
+        comment = items[0]
+        assert comment['review'] == reviews[1]['id']
+        assert comment['title'] == {
+            'id': titles[0]['id'], 'name': titles[0]['name']
+        }, (
+            f'Проверьте, что `{url}` отдаёт комментарии с отзывом и '
+            'произведением.'
+        )
+        review = items[1]
+        assert review['title']['id'] == titles[1]['id']
+        assert review['score'] == 8
+
+    def test_02_feed_since(self, client, admin_client, admin, user_client,
+                           user):
+        activity, _, _ = create_activity(
+            admin_client, admin, user_client, user
+        )
+        url = '/api/v1/feed/'
+        items = client.get(url).json()['results']
+        since = items[2]['pub_date']
+        items = client.get(url, {'since': since}).json()['results']
+        assert [(item['type'], item['id']) for item in items] == (
+            activity[:-4:-1]
+        ), (
+            f'Проверьте, что `{url}` с параметром `since` отдаёт только '
+            'записи не старше указанного времени.'
+        )
+        assert client.get(url, {'since': 'вчера'}).status_code == (
+            HTTPStatus.BAD_REQUEST
+        )
+        assert client.get(url, {'cursor': 'e30x'}).status_code == (
+            HTTPStatus.NOT_FOUND
+        ), f'Проверьте, что `{url}` отклоняет некорректный курсор.'
+
+    @pytest.mark.parametrize('limit', (1, 6))
+    def test_03_feed_queries(self, client, admin_client, admin, user_client,
+                             user, limit, django_assert_num_queries):
+        create_activity(admin_client, admin, user_client, user)
+        with django_assert_num_queries(2):
+            response = client.get('/api/v1/feed/', {'limit': limit})
+        assert len(response.json()['results']) == limit, (
+            'Проверьте, что страница ленты загружает авторов, отзывы и '
+            'произведения фиксированным числом запросов.'
+        )
@@ -0,0 +1,142 @@
+import math
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db.models import F
+
+from reviews.models import Review, Title
+from tests.utils import create_single_review, create_titles
+
+
+def create_trending(admin_client, user_client):
+    """Второе произведение популярнее первого, третье без отзывов"""
+    titles, _, _ = create_titles(admin_client)
+    create_single_review(admin_client, titles[0]['id'], 'Неплохо', 5)
+    create_single_review(admin_client, titles[1]['id'], 'Отлично', 10)
+    create_single_review(user_client, titles[1]['id'], 'Неплохо', 5)
+    response = admin_client.post('/api/v1/titles/', data={
+        'name': 'Без отзывов', 'year': 2000,
+        'genre': [titles[0]['genre'][0]],
+        'category': titles[0]['category'],
+    })
+    assert response.status_code == HTTPStatus.CREATED
+    return titles
+
+
+def get_scores():
+    return {title.pk: title.trending_score for title in Title.objects.all()}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16Trending:
+    url = '/api/v1/titles/trending/'
+
+    def test_01_trending_order(self, client, admin_client, user_client):
+        titles = create_trending(admin_client, user_client)
+        response = client.get(self.url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.url}` доступен без токена.'
+        )
+        data = response.json()
+        assert [title['id'] for title in data] == [
+            titles[1]['id'], titles[0]['id']
+        ], (
+            f'Проверьте, что `{self.url}` отдаёт произведения с отзывами '
+            'от самых популярных.'
+        )
+        assert data[0]['rating'] == 7 and data[0]['category'] == {
+            'name': 'Книги', 'slug': 'books'
+        }, (
+            f'Проверьте, что `{self.url}` отдаёт произведения в том же '
+            'виде, что и `/api/v1/titles/`.'
+        )
+        response = client.get(self.url, {'limit': 1})
+        assert [title['id'] for title in response.json()] == [
+            titles[1]['id']
+        ], f'Проверьте, что `{self.url}` учитывает параметр `limit`.'
+        for limit in (0, 101, 'abc'):
+            response = client.get(self.url, {'limit': limit})
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что `{self.url}` с некорректным `limit` '
+                'возвращает ответ со статусом 400.'
+            )
+
+    def test_02_trending_decay(self, client, admin_client, user_client,
+                               settings):
+        titles = create_trending(admin_client, user_client)
+        age = timedelta(seconds=10 * settings.TRENDING_HALF_LIFE)
+        # Отзывы на второе произведение оставлены десять периодов назад,
+        # отзыв на первое — только что; пересчёт популярности не нужен.
+        Review.objects.filter(title_id=titles[1]['id']).update(
+            pub_date=F('pub_date') - age
+        )
+        Title.objects.filter(pk=titles[1]['id']).update(
+            trending_key=F('trending_key') - 10 * math.log(2)
+        )
+        scores = get_scores()
+        assert scores[titles[0]['id']] == pytest.approx(5, rel=1e-3)
+        assert scores[titles[1]['id']] == pytest.approx(15 / 1024, rel=1e-3), (
+            'Проверьте, что популярность вдвое уменьшается за каждый '
+            'период полураспада.'
+        )
+        response = client.get(self.url)
+        assert [title['id'] for title in response.json()] == [
+            titles[0]['id'], titles[1]['id']
+        ], (
+            f'Проверьте, что `{self.url}` поднимает произведения со свежими '
+            'отзывами выше давно обсуждавшихся без периодического '
+            'пересчёта популярности.'
+        )
+        call_command('rebuild_aggregates')
+        for title_id, score in get_scores().items():
+            assert score == pytest.approx(scores[title_id], rel=1e-3), (
+                'Проверьте, что `rebuild_aggregates` пересчитывает '
+                'популярность по времени и оценкам отзывов.'
+            )
+        Review.objects.filter(title_id=titles[1]['id']).update(
+            pub_date=F('pub_date') - age
+        )
+        call_command('rebuild_aggregates')
+        assert [title['id'] for title in client.get(self.url).json()] == [
+            titles[0]['id']
+        ], (
+            f'Проверьте, что `{self.url}` не отдаёт произведения, '
+            'популярность которых упала ниже `TRENDING_MIN_SCORE`.'
+        )
+
+    def test_03_review_removed(self, client, admin_client, user_client,
+                               settings):
+        titles = create_trending(admin_client, user_client)
+        Review.objects.filter(title_id=titles[1]['id']).update(
+            pub_date=F('pub_date')
+            - timedelta(seconds=settings.TRENDING_HALF_LIFE)
+        )
+        call_command('rebuild_aggregates')
+        reviews = dict(Review.objects.filter(
+            title_id=titles[1]['id']
+        ).values_list('score', 'id'))
+        review_url = f'/api/v1/titles/{titles[1]["id"]}/reviews/{{}}/'
+        response = admin_client.patch(
+            review_url.format(reviews[10]), data={'score': 1}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = user_client.delete(review_url.format(reviews[5]))
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        scores = get_scores()
+        assert scores[titles[1]['id']] == pytest.approx(0.5, rel=1e-3), (
+            'Проверьте, что удаление отзыва и изменение оценки вычитают '
+            'из популярности затухший вклад прежней оценки.'
+        )
+        response = admin_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{Review.objects.get(title_id=titles[0]["id"]).id}/'
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert [title['id'] for title in client.get(self.url).json()] == [
+            titles[1]['id']
+        ], (
+            f'Проверьте, что `{self.url}` не отдаёт произведения, все '
+            'отзывы которых удалены.'
+        )
@@ -0,0 +1,113 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tests.utils import create_single_review, create_titles
+
+
+def get_role_client(user):
+    """Клиент с токеном, полученным через `/api/v1/auth/token/`"""
+    response = APIClient().post('/api/v1/auth/token/', data={
+        'username': user.username,
+        'confirmation_code': default_token_generator.make_token(user),
+    })
+    assert response.status_code == HTTPStatus.OK
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {response.json()["access"]}'
+    )
+    return client, AccessToken(response.json()['access'])
+
+
+def user_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    return response, [
+        query['sql'] for query in context.captured_queries
+        if 'reviews_user' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17RoleTokens:
+
+    def test_01_role_claims(self, admin):
+        _, token = get_role_client(admin)
+        assert (
+            token['username'], token['role'], token['role_version']
+        ) == (admin.username, 'admin', 0), (
+            'Проверьте, что `/api/v1/auth/token/` добавляет в токен имя, '
+            'роль и версию прав пользователя.'
+        )
+
+    def test_02_no_user_lookup(self, admin):
+        client, _ = get_role_client(admin)
+        url = '/api/v1/users/'
+        client.get(url)
+        response, queries = user_queries(client, '/api/v1/categories/')
+        assert response.status_code == HTTPStatus.OK
+        assert not queries, (
+            'Проверьте, что токен с ролью не требует загрузки '
+            f'пользователя из базы: {queries}'
+        )
+        response, _ = user_queries(client, url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что токен с ролью администратора даёт доступ к '
+            f'`{url}`.'
+        )
+
+    def test_03_role_change_revokes_token(self, admin_client, user):
+        client, _ = get_role_client(user)
+        url = f'/api/v1/users/{user.username}/reviews/'
+        assert client.get(url).status_code == HTTPStatus.FORBIDDEN
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'moderator'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что после смены роли через `/api/v1/users/` '
+            'выданный ранее токен с ролью перестаёт действовать.'
+        )
+        user.refresh_from_db()
+        client, token = get_role_client(user)
+        assert token['role'] == 'moderator'
+        assert client.get(url).status_code == HTTPStatus.OK, (
+            'Проверьте, что новый токен учитывает новую роль.'
+        )
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'bio': 'Новое о себе'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert client.get(url).status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение профиля без смены роли не отзывает '
+            'токен.'
+        )
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен удалённого пользователя не действует.'
+        )
+
+    def test_04_author_actions(self, admin_client, user):
+        client, _ = get_role_client(user)
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            client, titles[0]['id'], 'Отзыв', 7
+        ).json()
+        assert review['author'] == user.username
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{review["id"]}/'
+        response = client.patch(url, data={'text': 'Новый текст'})
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что автор с токеном с ролью может изменить свой '
+            'отзыв.'
+        )
+        response = client.patch('/api/v1/users/me/', data={'bio': 'Обо мне'})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['bio'] == 'Обо мне', (
+            'Проверьте, что `/api/v1/users/me/` работает с токеном с ролью.'
+        )
@@ -0,0 +1,77 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import User
+
+
+def count_user_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return sum(
+        'reviews_user' in query['sql'] for query in context.captured_queries
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18UserCache:
+    url = '/api/v1/categories/'
+
+    def test_01_cached_user(self, user_client, admin_client):
+        assert count_user_queries(user_client, self.url) == 1
+        assert count_user_queries(user_client, self.url) == 0, (
+            'Проверьте, что повторный запрос с тем же токеном берёт '
+            'пользователя из кеша.'
+        )
+        response = admin_client.get('/api/v1/cache-stats/')
+        assert response.status_code == HTTPStatus.OK
+        stats = response.json()['users']
+        assert (stats['hits'], stats['misses'], stats['size']) == (1, 2, 2), (
+            'Проверьте, что `/api/v1/cache-stats/` показывает попадания и '
+            f'промахи кеша пользователей: {stats}'
+        )
+        assert user_client.get(
+            '/api/v1/cache-stats/'
+        ).status_code == HTTPStatus.FORBIDDEN
+
+    def test_02_invalidation(self, user_client, admin_client, user):
+        url = f'/api/v1/users/{user.username}/reviews/'
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'moderator'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get(url).status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение пользователя через `/api/v1/users/` '
+            'удаляет его из кеша.'
+        )
+        response = user_client.patch('/api/v1/users/me/', data={'bio': 'Я'})
+        assert response.status_code == HTTPStatus.OK
+        assert count_user_queries(user_client, self.url) == 1, (
+            'Проверьте, что изменение профиля через `/api/v1/users/me/` '
+            'удаляет пользователя из кеша.'
+        )
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert user_client.get(url).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что удалённый пользователь не остаётся в кеше.'
+        )
+
+    def test_03_changed_in_other_process(self, admin_client, admin):
+        url = '/api/v1/users/'
+        assert admin_client.get(url).status_code == HTTPStatus.OK
+        # Другой процесс понижает роль: сигналы не доходят до этого
+        # процесса, версия прав в общем кеше истекает.
+        User.objects.filter(pk=admin.pk).update(
+            role='user', role_version=F('role_version') + 1
+        )
+        cache.clear()
+        assert admin_client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что пользователь из кеша с устаревшей версией прав '
+            'загружается из базы заново.'
+        )
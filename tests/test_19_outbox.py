@@ -0,0 +1,136 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from reviews.models import OutboxEmail
+
+
+class FailingBackend(BaseEmailBackend):
+    """Почтовый бэкенд, который не может доставить письмо"""
+
+    def send_messages(self, email_messages):
+        raise OSError('Сервер недоступен')
+
+
+class PickyBackend(EmailBackend):
+    """Не принимает письма для second; запоминает длину очереди"""
+    queued = []
+
+    def send_messages(self, email_messages):
+        self.queued.append(OutboxEmail.objects.count())
+        if email_messages[0].to == ['second@yamdb.fake']:
+            raise ValueError('Некорректное письмо')
+        return super().send_messages(email_messages)
+
+
+def signup(client, username):
+    response = client.post('/api/v1/auth/signup/', data={
+        'username': username, 'email': f'{username}@yamdb.fake'
+    })
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+class Test19Outbox:
+
+    def test_01_signup_queues_email(self, client):
+        signup(client, 'first')
+        signup(client, 'second')
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что регистрация не отправляет письмо сама, а '
+            'ставит его в очередь.'
+        )
+        assert list(OutboxEmail.objects.values_list(
+            'recipient', flat=True
+        )) == ['first@yamdb.fake', 'second@yamdb.fake']
+        call_command('send_outbox', batch_size=1)
+        assert [message.to for message in mail.outbox] == [
+            ['first@yamdb.fake'], ['second@yamdb.fake']
+        ], 'Проверьте, что `send_outbox` отправляет письма по очереди.'
+        assert 'Ваш код подтверждения' in mail.outbox[0].body
+        assert not OutboxEmail.objects.exists(), (
+            'Проверьте, что отправленные письма удаляются из очереди.'
+        )
+
+    def test_02_retry_with_backoff(self, client, settings):
+        signup(client, 'first')
+        settings.EMAIL_BACKEND = f'{__name__}.FailingBackend'
+        call_command('send_outbox')
+        email = OutboxEmail.objects.get()
+        assert email.attempts == 1 and 'Сервер недоступен' in (
+            email.last_error
+        )
+        delay = email.next_attempt_at - timezone.now()
+        assert timedelta(seconds=settings.OUTBOX_RETRY_DELAY - 5) < delay, (
+            'Проверьте, что неудачная отправка откладывается.'
+        )
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        call_command('send_outbox')
+        email.refresh_from_db()
+        delay = email.next_attempt_at - timezone.now()
+        assert timedelta(seconds=2 * settings.OUTBOX_RETRY_DELAY - 5) < (
+            delay
+        ), 'Проверьте, что пауза растёт после каждой неудачи.'
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+        call_command('send_outbox')
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что отложенное письмо не отправляется раньше срока.'
+        )
+        OutboxEmail.objects.update(
+            next_attempt_at=timezone.now(),
+            attempts=settings.OUTBOX_MAX_ATTEMPTS
+        )
+        call_command('send_outbox')
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что после OUTBOX_MAX_ATTEMPTS попыток письмо '
+            'остаётся в таблице и больше не отправляется.'
+        )
+        OutboxEmail.objects.update(attempts=2)
+        call_command('send_outbox')
+        assert len(mail.outbox) == 1 and not OutboxEmail.objects.exists()
+
+    def test_03_delete_each_sent_email(self, client, settings):
+        for username in ('first', 'second', 'third'):
+            signup(client, username)
+        settings.EMAIL_BACKEND = f'{__name__}.PickyBackend'
+        PickyBackend.queued = []
+        call_command('send_outbox')
+        assert [message.to for message in mail.outbox] == [
+            ['first@yamdb.fake'], ['third@yamdb.fake']
+        ], (
+            'Проверьте, что ошибка отправки одного письма не прерывает '
+            'отправку остальных.'
+        )
+        assert PickyBackend.queued == [3, 2, 2], (
+            'Проверьте, что письмо удаляется из очереди сразу после '
+            'отправки.'
+        )
+        email = OutboxEmail.objects.get()
+        assert email.attempts == 1 and 'Некорректное письмо' in (
+            email.last_error
+        )
+
+    def test_04_claim(self, client):
+        signup(client, 'first')
+        email = OutboxEmail.objects.get()
+        stale = OutboxEmail.objects.get()
+        assert email.claim() and not stale.claim(), (
+            'Проверьте, что письмо может занять только один обработчик.'
+        )
+        call_command('send_outbox')
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что `send_outbox` не отправляет письма, занятые '
+            'другим обработчиком.'
+        )
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        call_command('send_outbox')
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что письмо возвращается в очередь, если занявший '
+            'его обработчик не отправил его в срок.'
+        )
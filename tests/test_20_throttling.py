@@ -0,0 +1,118 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+
+from api.throttling import AuthIPThrottle
+from reviews.models import User
+
+
+def get_token(client, username, code, **extra):
+    return client.post('/api/v1/auth/token/', data={
+        'username': username, 'confirmation_code': code
+    }, **extra)
+
+
+def signup(client, username, **extra):
+    return client.post('/api/v1/auth/signup/', data={
+        'username': username, 'email': f'{username}@yamdb.fake'
+    }, **extra)
+
+
+@pytest.fixture
+def throttle_rates(settings):
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates
+        }
+    return set_rates
+
+
+@pytest.mark.django_db
+class Test20Throttling:
+
+    def test_01_sliding_window(self, throttle_store):
+        keys = ['key']
+        assert throttle_store.hit(keys, 2, 60, 0) is None
+        assert throttle_store.hit(keys, 2, 60, 1) is None
+        assert throttle_store.hit(keys, 2, 60, 2) == pytest.approx(88), (
+            'Проверьте, что ограничитель сообщает, через сколько секунд '
+            'оценка скользящего окна позволит следующий запрос.'
+        )
+        assert throttle_store.hit(keys, 2, 60, 89.5) is not None, (
+            'Проверьте, что запросы прошлого окна учитываются с весом '
+            'пересечения со скользящим окном.'
+        )
+        assert throttle_store.hit(keys, 2, 60, 90) is None
+        assert throttle_store.hit(['other'], 2, 60, 90) is None
+
+    def test_02_identity_limit(self, client, throttle_rates):
+        throttle_rates(auth_ip=None, auth_identity='2/min')
+        for _ in range(2):
+            assert signup(client, 'storm').status_code == HTTPStatus.OK
+        response = signup(client, 'storm')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что повторные регистрации с тем же `username` '
+            'ограничены по частоте.'
+        )
+        assert int(response['Retry-After']) > 0, (
+            'Проверьте, что ответ со статусом 429 содержит `Retry-After`.'
+        )
+        assert signup(client, 'calm').status_code == HTTPStatus.OK
+
+    def test_03_ip_limit(self, client, throttle_rates):
+        throttle_rates(auth_ip='3/min', auth_identity=None)
+        for index in range(3):
+            response = signup(client, f'user{index}')
+            assert response.status_code == HTTPStatus.OK
+        response = signup(client, 'user3')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что регистрации с одного IP-адреса ограничены по '
+            'частоте.'
+        )
+        response = signup(client, 'user3', REMOTE_ADDR='10.0.0.2')
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что лимит считается отдельно для каждого IP-адреса.'
+        )
+
+    def test_04_rates_from_settings(self, throttle_rates):
+        throttle_rates(auth_ip='7/hour')
+        assert (AuthIPThrottle().num_requests, AuthIPThrottle().duration) == (
+            7, 3600
+        )
+
+    def test_05_forwarded_for_ignored(self, client, throttle_rates):
+        throttle_rates(auth_ip='3/min', auth_identity=None)
+        statuses = [
+            signup(
+                client, f'user{index}',
+                HTTP_X_FORWARDED_FOR=f'10.1.0.{index}'
+            ).status_code
+            for index in range(4)
+        ]
+        assert statuses[-1] == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что лимит по IP-адресу нельзя обойти, меняя '
+            'заголовок `X-Forwarded-For`.'
+        )
+
+    def test_06_token_counts_failed_codes(self, client, throttle_rates):
+        throttle_rates(auth_ip=None, auth_identity=None, auth_code='2/min')
+        user = User.objects.create(username='storm', email='storm@yamdb.fake')
+        code = default_token_generator.make_token(user)
+        for _ in range(3):
+            assert signup(client, 'storm').status_code == HTTPStatus.OK
+            assert get_token(client, 'storm', code).status_code == (
+                HTTPStatus.OK
+            ), (
+                'Проверьте, что регистрации и запросы с верным кодом не '
+                'расходуют лимит получения токена.'
+            )
+        for _ in range(2):
+            response = get_token(client, 'storm', 'wrong')
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = get_token(client, 'storm', code)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что неверные коды подтверждения для `username` '
+            'ограничены по частоте.'
+        )
+        assert int(response['Retry-After']) > 0